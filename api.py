@@ -0,0 +1,316 @@
+import argparse
+import base64
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from flask import Blueprint, Response, jsonify, request
+
+# Mounted under this prefix on app.server (see app.py)
+API_PREFIX = '/api/v1'
+DATASETS = ('ai', 'coe')
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+# Serialized responses kept per (endpoint, query, data version)
+RESPONSE_CACHE_SIZE = 512
+# Program fields returned by the API: dataset column -> JSON field
+PROGRAM_FIELDS = {
+    'University': 'university',
+    'Program': 'program',
+    'Course Name': 'course_name',
+    'Course Type': 'course_type',
+    'Total program cost (num)': 'total_cost',
+    'term': 'term_cost',
+    'Link': 'link',
+}
+SORT_OPTIONS = ('cost_asc', 'cost_desc', 'university', 'term', 'relevance')
+
+
+class ApiError(Exception):
+    """Client error returned as {"error": message} with `status`."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class ResponseCache:
+    """Thread-safe LRU of serialized responses: key -> (etag, body bytes)."""
+
+    def __init__(self, maxsize=RESPONSE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+def _json_default(value):
+    # numpy scalars (np.int64 etc.) are not JSON serializable by default
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _to_json(payload):
+    return json.dumps(payload, ensure_ascii=False, default=_json_default, separators=(',', ':')).encode('utf-8')
+
+
+def parse_filters(args):
+    """Filter arguments with the same meaning as filter_and_sort_data's parameters (and the /export route)."""
+    sort_by = args.get('sort', 'cost_asc')
+    if sort_by not in SORT_OPTIONS:
+        raise ApiError(f"sort must be one of {', '.join(SORT_OPTIONS)}")
+    cost_range = None
+    if 'min_cost' in args or 'max_cost' in args:
+        try:
+            cost_range = (float(args.get('min_cost', 0)), float(args.get('max_cost', 'inf')))
+        except ValueError:
+            raise ApiError("min_cost and max_cost must be numbers")
+    return {
+        'selected_universities': sorted(args.getlist('university')),
+        'cost_range': cost_range,
+        'sort_by': sort_by,
+        'search_query': args.get('q') or None,
+    }
+
+
+def _filters_fingerprint(filters):
+    return hashlib.sha1(_to_json(filters)).hexdigest()[:12]
+
+
+def encode_cursor(offset, version, fingerprint):
+    raw = _to_json({'o': offset, 'v': version, 'f': fingerprint})
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, version, fingerprint):
+    """Offset stored in a cursor; rejects cursors of other filters (400) or older data (410)."""
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        offset = int(state['o'])
+    except (ValueError, KeyError, TypeError):
+        raise ApiError("Invalid cursor")
+    if state.get('f') != fingerprint:
+        raise ApiError("Cursor belongs to a different filter")
+    if state.get('v') != version:
+        raise ApiError("Data changed since this cursor was issued; restart from the first page", status=410)
+    return offset
+
+
+def _cost_stats(costs):
+    if costs.empty:
+        return {'avg_cost': None, 'min_cost': None, 'max_cost': None}
+    return {'avg_cost': round(float(costs.mean()), 2), 'min_cost': float(costs.min()), 'max_cost': float(costs.max())}
+
+
+def program_page(df, positions, offset, limit):
+    """JSON-ready records of df.iloc[positions[offset:offset + limit]]."""
+    columns = [column for column in PROGRAM_FIELDS if column in df.columns]
+    page = df.iloc[positions[offset:offset + limit]][columns].astype(object)
+    page = page.where(page.notna(), None).rename(columns=PROGRAM_FIELDS)
+    return page.to_dict('records')
+
+
+def university_summary(df, positions):
+    """Programs and cost stats per university over the filtered rows."""
+    rows = df.iloc[positions]
+    if rows.empty:
+        return []
+    grouped = rows.groupby('University', observed=True, sort=True)['Total program cost (num)']
+    summary = grouped.agg(['count', 'mean', 'min', 'max'])
+    return [
+        {'university': university, 'programs': int(row['count']), 'avg_cost': round(float(row['mean']), 2),
+         'min_cost': float(row['min']), 'max_cost': float(row['max'])}
+        for university, row in summary.iterrows()
+    ]
+
+
+def create_api_blueprint(filtered_positions, data_version, refresh=None, cache=None):
+    """
+    Read-only JSON API over the program datasets.
+
+    Args:
+        filtered_positions (callable): (dataset, selected_universities, cost_range, sort_by, search_query)
+            -> (DataFrame, row positions), e.g. app.filtered_positions.
+        data_version (callable): Returns the current data generation; part of every cache key and cursor.
+        refresh (callable, optional): Called before each request to pick up newly published data.
+        cache (ResponseCache, optional): Shared response cache.
+
+    Returns:
+        Blueprint: Serves /<dataset>/programs, /<dataset>/universities and /<dataset>/stats.
+    """
+    api = Blueprint('api', __name__, url_prefix=API_PREFIX)
+    api.response_cache = cache if cache is not None else ResponseCache()
+
+    @api.errorhandler(ApiError)
+    def api_error(error):
+        return jsonify(error=str(error)), error.status
+
+    def cached_json(dataset, build):
+        """Serve build()'s payload from the cache with an ETag; 304 when If-None-Match matches."""
+        if dataset not in DATASETS:
+            raise ApiError(f"Unknown dataset '{dataset}', use one of {', '.join(DATASETS)}", status=404)
+        if refresh is not None:
+            refresh()
+        version = data_version()
+        key = (request.path, tuple(sorted(request.args.items(multi=True))), version)
+        entry = api.response_cache.get(key)
+        if entry is None:
+            body = _to_json({'data_version': version, **build(version)})
+            entry = (hashlib.sha1(body).hexdigest(), body)
+            api.response_cache.put(key, entry)
+        etag, body = entry
+        if etag in request.if_none_match:
+            response = Response(status=304)
+        else:
+            response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'  # Clients may keep it but must revalidate
+        return response
+
+    @api.route('/<dataset>/programs')
+    def programs(dataset):
+        """Filtered, sorted programs with cursor pagination (?limit=, ?cursor= from next_cursor)."""
+
+        def build(version):
+            filters = parse_filters(request.args)
+            try:
+                limit = min(max(int(request.args.get('limit', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+            except ValueError:
+                raise ApiError("limit must be an integer")
+            fingerprint = _filters_fingerprint(filters)
+            cursor = request.args.get('cursor')
+            offset = decode_cursor(cursor, version, fingerprint) if cursor else 0
+            df, positions = filtered_positions(dataset, **filters)
+            end = offset + limit
+            return {
+                'total': len(positions),
+                'data': program_page(df, positions, offset, limit),
+                'next_cursor': encode_cursor(end, version, fingerprint) if end < len(positions) else None,
+            }
+
+        return cached_json(dataset, build)
+
+    @api.route('/<dataset>/universities')
+    def universities(dataset):
+        """Programs and cost stats per university for the filter."""
+
+        def build(version):
+            df, positions = filtered_positions(dataset, **parse_filters(request.args))
+            return {'data': university_summary(df, positions)}
+
+        return cached_json(dataset, build)
+
+    @api.route('/<dataset>/stats')
+    def stats(dataset):
+        """The dashboard's summary cards (programs, avg/min/max total cost) for the filter."""
+
+        def build(version):
+            df, positions = filtered_positions(dataset, **parse_filters(request.args))
+            costs = df['Total program cost (num)'].iloc[positions]
+            return {'programs': len(positions), **_cost_stats(costs)}
+
+        return cached_json(dataset, build)
+
+    return api
+
+
+def benchmark(base_url, paths, seconds=5.0, threads=8, revalidate=False):
+    """Hit `paths` round-robin from `threads` threads for `seconds`; returns requests/s and latency.
+
+    With `revalidate`, requests send the ETag of the first response (measures 304 handling).
+    """
+    import statistics
+    import urllib.error
+    import urllib.request
+
+    etags = {}
+    if revalidate:
+        for path in paths:
+            with urllib.request.urlopen(base_url + path) as response:
+                etags[path] = response.headers['ETag']
+    latencies, errors = [], []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker(start):
+        i = start
+        local = []
+        while time.perf_counter() < deadline:
+            path = paths[i % len(paths)]
+            i += 1
+            req = urllib.request.Request(base_url + path, headers={'If-None-Match': etags[path]} if revalidate else {})
+            began = time.perf_counter()
+            try:
+                with urllib.request.urlopen(req) as response:
+                    response.read()
+            except urllib.error.HTTPError as e:
+                if e.code != 304:
+                    errors.append(e.code)
+            local.append(time.perf_counter() - began)
+        with lock:
+            latencies.extend(local)
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'rps': round(len(latencies) / seconds, 1),
+        'p50_ms': round(1000 * statistics.median(latencies), 2) if latencies else None,
+        'p95_ms': round(1000 * latencies[int(0.95 * (len(latencies) - 1))], 2) if latencies else None,
+        'errors': len(errors),
+    }
+
+
+# Local throughput check: python api.py (serves app.server on a free port and benchmarks it)
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the JSON API (requests per second).')
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    import app as dashboard
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server('127.0.0.1', 0, dashboard.app.server, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_port}{API_PREFIX}'
+    bench_paths = ['/ai/programs', '/coe/programs?sort=cost_desc&limit=20', '/ai/stats', '/coe/universities',
+                   '/coe/programs?q=computer&sort=relevance']
+    try:
+        dashboard.api_blueprint.response_cache = ResponseCache(maxsize=0)
+        print('uncached     ', benchmark(base, bench_paths, args.seconds, args.threads))
+        dashboard.api_blueprint.response_cache = ResponseCache()
+        print('cached       ', benchmark(base, bench_paths, args.seconds, args.threads))
+        print('If-None-Match', benchmark(base, bench_paths, args.seconds, args.threads, revalidate=True))
+    finally:
+        server.shutdown()
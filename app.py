@@ -1,18 +1,122 @@
+from startup_report import StartupTimer
+startup = StartupTimer()  # Per-phase cold-start timings, printed once the app is ready
+
 from dash import Dash, html, dash_table, dcc, callback, Output, Input, State
+startup.mark('import dash')
 import pandas as pd
-import plotly.express as px
+import numpy as np
+startup.mark('import pandas/numpy')
+# plotly.express is imported on first use (plotly_express()), so a cold worker skips it
 import plotly.graph_objects as go
 import datetime
+import os
+import threading
+import time
 import dash_bootstrap_components as dbc
 from datetime import datetime, timedelta
+from functools import lru_cache
+from urllib.parse import urlencode
+from flask import Response, abort, jsonify, request
+startup.mark('import plotly/dbc/flask')
+from search_index import ProgramSearchIndex, SEARCH_MIN_SCORE
+from history_store import HISTORY_DB_PATH, summary_history
+from payload import install_payload_stats, use_slim_figure_template
+from validation import WARNINGS_COLUMN, issue_counts, validate_costs
+from export import EXPORT_MIMETYPES, stream_export, xlsx_available
+from api import ApiError, create_api_blueprint, parse_filters
+from cost_histogram import CostHistogram
+from single_flight import CallbackCoalescer
+from crawl_trace import TRACE_PATH, latency_percentiles, read_traces, run_health
+from budget_planner import BudgetPlanner
+startup.mark('import local modules')
+
+def plotly_express():
+    """plotly.express, imported on the first px chart instead of at startup."""
+    import plotly.express as px
+    return px
+
 
 # --- 1. Initialize the app ---
-app = Dash(__name__, suppress_callback_exceptions=True, external_stylesheets=[dbc.themes.LUX])
+# compress=True gzips responses with Flask-Compress (per-encoding ETags, Vary: Accept-Encoding)
+app = Dash(__name__, suppress_callback_exceptions=True, compress=True, external_stylesheets=[dbc.themes.LUX])
+# Per-callback byte counts before/after compression at /_payload-stats, and slim figure JSON
+install_payload_stats(app.server)
+use_slim_figure_template()
+startup.mark('create app')
 
 # --- 2. Load CSV data ---
-try:
+
+# Text columns repeated across rows and datasets; stored as ordered categoricals
+TEXT_COLUMNS = ['University', 'Course Name', 'Program']
+THAI_LEADING_VOWELS = 'เแโใไ'
+THAI_TONE_MARKS = '่้๊๋์'
+
+
+def thai_collation_key(text):
+    """Sort key that orders Thai text the way a Thai dictionary does."""
+    # Leading vowels are written before their consonant but sort after it
+    chars = list(str(text))
+    i = 0
+    while i < len(chars) - 1:
+        if chars[i] in THAI_LEADING_VOWELS:
+            chars[i], chars[i + 1] = chars[i + 1], chars[i]
+            i += 2
+        else:
+            i += 1
+    swapped = ''.join(chars)
+    # Tone marks only break ties between otherwise equal words
+    primary = ''.join(c for c in swapped if c not in THAI_TONE_MARKS)
+    return (primary, swapped)
+
+
+def encode_text_columns(dataframes):
+    """Convert TEXT_COLUMNS to ordered categoricals sharing one Thai-collated vocabulary."""
+    for col in TEXT_COLUMNS:
+        frames = [df for df in dataframes if col in df.columns]
+        if not frames:
+            continue
+        values = pd.unique(pd.concat([df[col].dropna().astype(str) for df in frames]))
+        categories = sorted(values, key=thai_collation_key)
+        for df in frames:
+            df[col] = pd.Categorical(df[col].astype('string'), categories=categories, ordered=True)
+
+
+def present_categories(series):
+    """Categories that actually occur in a categorical series, in collation order."""
+    codes = np.unique(series.cat.codes.to_numpy())
+    return series.cat.categories[codes[codes >= 0]].tolist()
+
+
+def decode_text_columns(df):
+    """Return a copy with categorical text columns turned back into plain strings (for charts/tables)."""
+    return df.astype({col: object for col in TEXT_COLUMNS if col in df.columns})
+
+
+# Published by pipeline.py (or the notebook); re-read automatically when they change
+AI_DATA_PATH = os.path.join('data', 'aie', 'cleaned_aie.csv')
+COE_DATA_PATH = os.path.join('data', 'coe', 'coe_with_term_and_total.csv')
+# Seconds between checks of the data files' modification times
+DATA_CHECK_INTERVAL = 10
+
+
+def drop_invalid_rows(df, label):
+    """Keep only rows that pass validation.py, so quarantined costs never reach the summary stats.
+
+    Rows with warnings only (university outliers) are kept.
+    """
+    valid, quarantine = validate_costs(df)
+    if not quarantine.empty:
+        print(f"⚠️ {label}: ignoring {len(quarantine)} rows that failed validation {issue_counts(quarantine)}")
+    warnings = issue_counts(valid, WARNINGS_COLUMN)
+    if warnings:
+        print(f"ℹ️ {label}: keeping rows flagged {warnings}")
+    return valid.dropna(subset=['Total program cost (num)'])
+
+
+def load_program_data():
+    """Load and clean both datasets; returns (ai_programs_df, coe_programs_df, search_indexes, cost_histograms)."""
     # --- Load and clean AI Programs Data ---
-    ai_programs_df = pd.read_csv('data\\aie\\cleaned_aie.csv')
+    ai_programs_df = pd.read_csv(AI_DATA_PATH)
     # Ensure numerical columns are correct type for AI data
     # Clean 'Total program cost'
     ai_programs_df['Total program cost (num)'] = pd.to_numeric(
@@ -22,17 +126,47 @@ try:
     ai_programs_df['term'] = pd.to_numeric(
         ai_programs_df["term"].astype(str).str.replace(",", ""), errors='coerce'
     )
-    ai_programs_df = ai_programs_df.dropna(subset=['Total program cost (num)'])
+    ai_programs_df = drop_invalid_rows(ai_programs_df, 'AI')
 
     # --- Load and clean COE Programs Data ---
-    coe_programs_df = pd.read_csv('data\\coe\\coe_with_term_and_total.csv')
+    coe_programs_df = pd.read_csv(COE_DATA_PATH)
     # Ensure numerical columns are correct type for COE data
     coe_programs_df['Total program cost (num)'] = pd.to_numeric(
         coe_programs_df["Total program cost"].astype(str).str.replace(",", ""), errors='coerce'
     )
     # Assuming 'coe_with_term_and_total.csv' already has a numeric 'term' column
-    coe_programs_df = coe_programs_df.dropna(subset=['Total program cost (num)'])
+    coe_programs_df = drop_invalid_rows(coe_programs_df, 'COE')
+
+    # --- Dictionary-encode repeated text columns (shared vocabulary across datasets) ---
+    encode_text_columns([ai_programs_df, coe_programs_df])
+
+    # --- Build fuzzy search indexes over Course Name / Program ---
+    search_indexes = {
+        'ai': ProgramSearchIndex(ai_programs_df),
+        'coe': ProgramSearchIndex(coe_programs_df),
+    }
 
+    # --- Bin costs once for the distribution charts ---
+    cost_histograms = {
+        'ai': CostHistogram(ai_programs_df),
+        'coe': CostHistogram(coe_programs_df),
+    }
+
+    return ai_programs_df, coe_programs_df, search_indexes, cost_histograms
+
+
+def _data_mtimes():
+    return tuple(os.path.getmtime(path) if os.path.exists(path) else None for path in (AI_DATA_PATH, COE_DATA_PATH))
+
+
+try:
+    ai_programs_df, coe_programs_df, search_indexes, cost_histograms = load_program_data()
+    # (df, search index, cost histogram) per dataset, replaced as a whole on reload (see data_snapshot)
+    _snapshots = {key: (df, search_indexes[key], cost_histograms[key])
+                  for key, df in (('ai', ai_programs_df), ('coe', coe_programs_df))}
+    _loaded_mtimes = _data_mtimes()
+    _last_data_check = datetime.now()
+    startup.mark('load data and build indexes')
     print("CSV files loaded and cleaned successfully!")
     print(f"AI Programs: {len(ai_programs_df)} records")
     print(f"COE Programs: {len(coe_programs_df)} records")
@@ -45,6 +179,35 @@ except Exception as e:
     print(f"An error occurred during data loading or cleaning: {e}")
     raise SystemExit("Failed to initialize data. Please check your CSV files and column names.")
 
+_data_lock = threading.Lock()
+
+
+def refresh_data_if_changed():
+    """Reload the datasets when pipeline.py has published new files (checked every DATA_CHECK_INTERVAL s)."""
+    global ai_programs_df, coe_programs_df, search_indexes, cost_histograms, _snapshots, _loaded_mtimes, _last_data_check, _data_generation
+    if datetime.now() - _last_data_check < timedelta(seconds=DATA_CHECK_INTERVAL):
+        return False
+    with _data_lock:
+        _last_data_check = datetime.now()
+        mtimes = _data_mtimes()
+        if mtimes == _loaded_mtimes or None in mtimes:
+            return False
+        try:
+            ai_df, coe_df, indexes, histograms = load_program_data()
+        except Exception as e:
+            print(f"Keeping previous data, reload failed: {e}")
+            return False
+        _snapshots = {'ai': (ai_df, indexes['ai'], histograms['ai']), 'coe': (coe_df, indexes['coe'], histograms['coe'])}
+        ai_programs_df, coe_programs_df, search_indexes, cost_histograms = ai_df, coe_df, indexes, histograms
+        _loaded_mtimes = mtimes
+        _data_generation += 1
+        _cached_filtered_positions.cache_clear()
+        threading.Thread(target=warm_default_states, daemon=True).start()
+        _page_layouts.clear()  # Dropdown options and slider ranges depend on the data
+        print(f"🔄 Reloaded data: AI {len(ai_df)} / COE {len(coe_df)} records")
+        return True
+
+
 # --- 3. Navigation bar ---
 navbar = dbc.Navbar(
     [
@@ -53,6 +216,8 @@ navbar = dbc.Navbar(
                 dbc.NavItem(dbc.NavLink("Home", href="/", active="exact", className="ms-5")),
                 dbc.NavItem(dbc.NavLink("AI Programs", href="/ai-programs", active="exact")),
                 dbc.NavItem(dbc.NavLink("Computer Engineering", href="/coe-programs", active="exact")),
+                dbc.NavItem(dbc.NavLink("Budget Planner", href="/planner", active="exact")),
+                dbc.NavItem(dbc.NavLink("Crawl Health", href="/crawl-health", active="exact")),
             ], navbar=True),
             xs=12, md=6,
         ),
@@ -71,12 +236,24 @@ def create_program_filters(program_type, df):
     """Create filter components for university programs"""
     return dbc.Card([
         dbc.CardBody([
+            dbc.Row([
+                dbc.Col([
+                    html.Label("Search Program:", className="fw-bold"),
+                    dcc.Input(
+                        id=f'{program_type}-search',
+                        type='search',
+                        placeholder="e.g. ปัญญาประดิษฐ์ or Data Science",
+                        debounce=True,
+                        className="form-control"
+                    )
+                ], md=12, className="mb-3"),
+            ]),
             dbc.Row([
                 dbc.Col([
                     html.Label("University:", className="fw-bold"),
                     dcc.Dropdown(
                         id=f'{program_type}-university-filter',
-                        options=[{'label': uni, 'value': uni} for uni in sorted(df['University'].unique())],
+                        options=[{'label': uni, 'value': uni} for uni in present_categories(df['University'])],
                         placeholder="Select University",
                         multi=True
                     )
@@ -103,7 +280,8 @@ def create_program_filters(program_type, df):
                             {'label': 'Total Cost (Low to High)', 'value': 'cost_asc'},
                             {'label': 'Total Cost (High to Low)', 'value': 'cost_desc'},
                             {'label': 'University Name', 'value': 'university'},
-                            {'label': 'Term Cost', 'value': 'term'}
+                            {'label': 'Term Cost', 'value': 'term'},
+                            {'label': 'Best Match (Search)', 'value': 'relevance'}
                         ],
                         value='cost_asc'
                     )
@@ -117,7 +295,16 @@ def create_program_filters(program_type, df):
 def create_program_table(program_type):
     """Create table component for university programs, wrapped in a curved card."""
     return dbc.Card([
-        dbc.CardHeader(html.H5("Program Details")),
+        dbc.CardHeader(dbc.Row([
+            dbc.Col(html.H5("Program Details", className="mb-0")),
+            dbc.Col([
+                # hrefs follow the current filters (update_<program_type>_export_links)
+                dbc.Button("Download CSV", id=f'{program_type}-export-csv', href=export_href(program_type, 'csv'),
+                           external_link=True, color="primary", outline=True, size="sm", className="me-2"),
+                dbc.Button("Download XLSX", id=f'{program_type}-export-xlsx', href=export_href(program_type, 'xlsx'),
+                           external_link=True, color="primary", outline=True, size="sm"),
+            ], width="auto"),
+        ], align="center")),
         dbc.CardBody([
             html.Div(id=f'{program_type}-table-container')
         ])
@@ -132,7 +319,7 @@ def create_program_charts(program_type):
         # --- Chart Card for Cost Distribution (Left) ---
         dbc.Col([
             dbc.Card([
-                dbc.CardHeader(html.H5("Cost Distribution", className="mb-0")),
+                dbc.CardHeader(html.H5("Cost Comparison", className="mb-0")),
                 dbc.CardBody([
                     dcc.Graph(id=f'{program_type}-cost-histogram', config={'displayModeBar': False}) # ID kept for compatibility
                 ], style={'backgroundColor': 'white'}), # Set card body background to white
@@ -151,6 +338,45 @@ def create_program_charts(program_type):
 # --- END OF MODIFICATION ---
 
 
+def create_cost_distribution_chart(program_type):
+    """Create the cost histogram / ECDF card with total vs per-term and linear vs log toggles."""
+    return dbc.Card([
+        dbc.CardHeader(dbc.Row([
+            dbc.Col(html.H5("Cost Distribution", className="mb-0")),
+            dbc.Col([
+                dbc.RadioItems(
+                    id=f'{program_type}-distribution-view',
+                    options=[{'label': 'Total', 'value': 'total'}, {'label': 'Per term', 'value': 'term'}],
+                    value='total', inline=True, className="me-3"
+                ),
+                dbc.RadioItems(
+                    id=f'{program_type}-distribution-scale',
+                    options=[{'label': 'Linear', 'value': 'linear'}, {'label': 'Log', 'value': 'log'}],
+                    value='linear', inline=True, className="me-3"
+                ),
+                dbc.RadioItems(
+                    id=f'{program_type}-distribution-mode',
+                    options=[{'label': 'Histogram', 'value': 'histogram'}, {'label': 'ECDF', 'value': 'ecdf'}],
+                    value='histogram', inline=True
+                ),
+            ], width="auto", className="d-flex"),
+        ], align="center")),
+        dbc.CardBody([
+            dcc.Graph(id=f'{program_type}-cost-distribution', config={'displayModeBar': False})
+        ], style={'backgroundColor': 'white'}),
+    ], className="mb-4 shadow rounded-3", style={'backgroundColor': 'white'})
+
+
+def create_cost_history_chart(program_type):
+    """Create the cost-over-crawls chart card, read from the scrape-history store."""
+    return dbc.Card([
+        dbc.CardHeader(html.H5("Cost History (per crawl)", className="mb-0")),
+        dbc.CardBody([
+            dcc.Graph(id=f'{program_type}-cost-history', config={'displayModeBar': False})
+        ], style={'backgroundColor': 'white'}),
+    ], className="mb-4 shadow rounded-3", style={'backgroundColor': 'white'})
+
+
 def create_summary_stats(program_type):
     """Create summary statistics cards"""
     return dbc.Row([
@@ -190,12 +416,19 @@ def create_summary_stats(program_type):
 
 
 # --- 5. Helper Function for Filtering and Sorting ---
-def filter_and_sort_data(df, selected_universities, cost_range, sort_by):
+def filter_and_sort_data(df, selected_universities, cost_range, sort_by, search_query=None, search_index=None):
     """Helper function to filter and sort data"""
     filtered_df = df.copy()
+    # Fuzzy search on Course Name / Program
+    if search_query and search_query.strip() and search_index is not None:
+        # Aligned by row label, so df and search_index must come from the same load (see data_snapshot)
+        filtered_df['Match score'] = pd.Series(search_index.scores(search_query), index=search_index.index)
+        filtered_df = filtered_df[filtered_df['Match score'] >= SEARCH_MIN_SCORE]
     # Filter by University
+    # University filter and sort work on integer category codes
     if selected_universities and len(selected_universities) > 0:
-        filtered_df = filtered_df[filtered_df['University'].isin(selected_universities)]
+        wanted_codes = filtered_df['University'].cat.categories.get_indexer(selected_universities)
+        filtered_df = filtered_df[np.isin(filtered_df['University'].cat.codes.to_numpy(), wanted_codes[wanted_codes >= 0])]
     # Filter by Cost Range
     if cost_range and len(cost_range) == 2:
         filtered_df = filtered_df[
@@ -208,135 +441,389 @@ def filter_and_sort_data(df, selected_universities, cost_range, sort_by):
     elif sort_by == 'cost_desc':
         filtered_df = filtered_df.sort_values(by='Total program cost (num)', ascending=False)
     elif sort_by == 'university':
-        filtered_df = filtered_df.sort_values(by='University')
+        order = np.argsort(filtered_df['University'].cat.codes.to_numpy(), kind='stable')
+        filtered_df = filtered_df.iloc[order]
     elif sort_by == 'term':
         # Handle potential NaN in 'term' if necessary
         filtered_df = filtered_df.sort_values(by='term', ascending=True)
+    elif sort_by == 'relevance' and 'Match score' in filtered_df.columns:
+        filtered_df = filtered_df.sort_values(by='Match score', ascending=False, kind='stable')
     return filtered_df
 
 
-# --- 6. Page layouts ---
-home_layout = html.Div([
-    dbc.Row([
-        dbc.Col([
-            html.H1("Welcome to University Programs Dashboard", className="text-center mb-4"),
-            # --- Added Summary Card Below Header ---
-                                dbc.Row([
-                        dbc.Col([
-                            dbc.Card([
-                                dbc.CardBody([
-                                    html.H3(f"{len(ai_programs_df)}", className="text-primary"),
-                                    html.P("AI Engineering Programs")
-                                ])
-                            ], className="text-center")
-                        ], md=6),
-                        dbc.Col([
-                            dbc.Card([
-                                dbc.CardBody([
-                                    html.H3(f"{len(coe_programs_df)}", className="text-success"),
-                                    html.P("Computer Engineering Programs")
-                                ])
-                            ], className="text-center")
-                        ], md=6),
-                    ]),
+def data_snapshot(program_type):
+    """(df, search_index, cost_histogram) of one dataset, all from the same data load.
 
-            dbc.Row([
-                dbc.Col([
-                    dbc.Card([
-                        dbc.CardHeader(html.H4("Cost Overview - AI Engineering", className="mb-0")),
-                        dbc.CardBody([
-                            dcc.Graph(
-                                id='home-ai-cost-graph',
-                                figure=px.bar(
-                                    ai_programs_df.sort_values(by="Total program cost (num)", ascending=False),
-                                    x="University",
-                                    y="Total program cost (num)",
-                                    title='Total Program Cost (AI Engineering)',
-                                    labels={
-                                        "Total program cost (num)": "Total Cost (Baht)",
-                                        "University": ""
-                                    },
-                                    color="University",
-                                    color_discrete_sequence=px.colors.qualitative.Set1,
-                                ).update_layout(
-                                    xaxis_tickangle=-45,
-                                    height=500,
-                                    showlegend=False,
-                                    xaxis=dict(showticklabels=False),
-                                    # --- Set background colors to white ---
-                                    plot_bgcolor='white',
-                                    paper_bgcolor='white'
-                                    # --- End of background color setting ---
-                                ).update_traces(),
-                                config={'displayModeBar': False}
-                            ),
-                            html.P("Showing all AI Engineering programs sorted by cost.", className="text-muted small mt-2")
-                        ], style={'backgroundColor': 'white'}), # Set card body background to white
-                    ], className="mb-4 shadow rounded-3", style={'backgroundColor': 'white'}) # Set card background to white
-                ], md=6),
-                dbc.Col([
-                    dbc.Card([
-                        dbc.CardHeader(html.H4("Cost Overview - Computer Engineering", className="mb-0")),
-                        dbc.CardBody([
-                            dcc.Graph(
-                                id='home-coe-cost-graph',
-                                figure=px.bar(
-                                    coe_programs_df.sort_values(by="Total program cost (num)", ascending=False).head(10),
-                                    x='University',
-                                    y='Total program cost (num)',
-                                    title='Top 10 Universities - Total Program Cost (Computer Engineering)',
-                                    labels={
-                                        'Total program cost (num)': 'Total Cost (Baht)',
-                                        'University': ''
-                                    },
-                                    color="University",
-                                    color_discrete_sequence=px.colors.qualitative.Set1,
-                                ).update_layout(
-                                    xaxis_tickangle=-45,
-                                    height=500,
-                                    showlegend=False,
-                                    xaxis=dict(showticklabels=False),
-                                     # --- Set background colors to white ---
-                                    plot_bgcolor='white',
-                                    paper_bgcolor='white'
-                                    # --- End of background color setting ---
-                                ).update_traces(),
-                                config={'displayModeBar': False}
-                            ),
-                            html.P("Showing the top 10 universities by program cost.", className="text-muted small mt-2")
-                        ], style={'backgroundColor': 'white'}), # Set card body background to white
-                    ], className="mb-4 shadow rounded-3", style={'backgroundColor': 'white'}) # Set card background to white
-                ], md=6),
-            ]),
+    Read once per request: reading ai_programs_df and search_indexes separately could pair
+    a frame with the index of a reload that happened in between.
+    """
+    return _snapshots[program_type]
+
+
+def filter_program_data(program_type, selected_universities, cost_range, sort_by, search_query=None):
+    """filter_and_sort_data over one consistent snapshot of a dataset and its search index."""
+    df, search_index, _ = data_snapshot(program_type)
+    return filter_and_sort_data(df, selected_universities, cost_range, sort_by, search_query, search_index)
+
+
+_data_generation = 0  # Bumped on every data reload; part of the filtered-index cache key
+# Identical concurrent callback calls share one computation; default page states are precomputed
+callback_coalescer = CallbackCoalescer(lambda: _data_generation)
+
+
+def default_filter_inputs(program_type):
+    """Inputs the filter controls send on a page's first, unfiltered load (see create_program_filters)."""
+    df = ai_programs_df if program_type == 'ai' else coe_programs_df
+    costs = df['Total program cost (num)']
+    return None, [int(costs.min()), int(costs.max())], 'cost_asc', None
+
+
+def warm_default_states():
+    """Precompute every page's default callback outputs for the current data (run in a background thread)."""
+    try:
+        count = callback_coalescer.warm()
+        print(f"🔥 Precomputed {count} default callback states")
+    except Exception as e:
+        print(f"Could not precompute default states: {e}")
+
+
+@lru_cache(maxsize=256)
+def _cached_filtered_positions(program_type, generation, universities, cost_range, sort_by, search_query):
+    df, index, _ = data_snapshot(program_type)
+    filtered_df = filter_and_sort_data(df, list(universities), list(cost_range), sort_by, search_query, index)
+    positions = df.index.get_indexer(filtered_df.index)
+    positions.setflags(write=False)  # Shared between concurrent requests
+    return df, positions
+
+
+def filtered_positions(program_type, selected_universities, cost_range, sort_by, search_query=None):
+    """Cached (dataset, row positions) of a filter state; the positions always refer to the returned frame."""
+    return _cached_filtered_positions(
+        program_type, _data_generation, tuple(selected_universities or ()), tuple(cost_range or ()),
+        sort_by, search_query or None,
+    )
+
+
+def export_href(program_type, fmt, selected_universities=None, cost_range=None, sort_by=None, search_query=None):
+    """Download URL of the filtered table for the /export route."""
+    params = {'university': list(selected_universities or [])}
+    if cost_range and len(cost_range) == 2:
+        params.update(min_cost=cost_range[0], max_cost=cost_range[1])
+    if sort_by:
+        params['sort'] = sort_by
+    if search_query:
+        params['q'] = search_query
+    query = urlencode(params, doseq=True)
+    return f"/export/{program_type}.{fmt}" + (f"?{query}" if query else "")
+
+
+def build_cost_distribution_figure(program_type, selected_universities, cost_range, search_query, view, scale, mode):
+    """Histogram or ECDF of total/per-term cost from the precomputed bins."""
+    df, search_index, histogram = data_snapshot(program_type)
+    if search_query and search_query.strip():
+        # Search results are an arbitrary row subset: bin them on the precomputed edges
+        filtered_df = filter_and_sort_data(df, selected_universities, cost_range, None, search_query, search_index)
+        edges, counts = histogram.counts_for_rows(filtered_df, view, scale)
+    else:
+        edges, counts = histogram.counts(selected_universities, cost_range, view, scale)
+    label = 'Cost per Term (Baht)' if view == 'term' else 'Total Program Cost (Baht)'
+    fig = go.Figure()
+    total = int(counts.sum())
+    if total == 0:
+        fig.add_annotation(text="No data available", showarrow=False, xref="paper", yref="paper", x=0.5, y=0.5)
+    elif mode == 'ecdf':
+        share = np.concatenate([[0], np.cumsum(counts)]) / total
+        fig.add_trace(go.Scatter(
+            x=edges, y=share, mode='lines', line_shape='hv',
+            hovertemplate='≤ %{x:,.0f} Baht: %{y:.0%} of programs<extra></extra>',
+        ))
+        fig.update_yaxes(title_text='Share of Programs', tickformat='.0%', range=[0, 1.02])
+    else:
+        if scale == 'log':
+            # On a log axis plotly.js offsets bars in log10 units, so the width is in decades
+            centers, widths = np.sqrt(edges[:-1] * edges[1:]), np.diff(np.log10(edges))
+        else:
+            centers, widths = (edges[:-1] + edges[1:]) / 2, np.diff(edges)
+        fig.add_trace(go.Bar(
+            x=centers, y=counts, width=widths, customdata=np.column_stack([edges[:-1], edges[1:]]),
+            marker_line_width=1, marker_line_color='white',
+            hovertemplate='%{customdata[0]:,.0f} – %{customdata[1]:,.0f} Baht: %{y} programs<extra></extra>',
+        ))
+        fig.update_yaxes(title_text='Number of Programs')
+    fig.update_xaxes(title_text=label, type='log' if scale == 'log' else 'linear')
+    fig.update_layout(title=f'{"ECDF" if mode == "ecdf" else "Histogram"} of {label} ({total} programs)',
+                      bargap=0, showlegend=False)
+    return fig
+
+
+def build_cost_history_figure(dataset, selected_universities):
+    """Line chart of average total cost per crawl, from pre-aggregated snapshot summaries."""
+    px = plotly_express()
+    history = pd.DataFrame()
+    if os.path.exists(HISTORY_DB_PATH):
+        history = summary_history(dataset, selected_universities, db_path=HISTORY_DB_PATH)
+    if history.empty:
+        fig = go.Figure()
+        fig.add_annotation(text="No crawl history recorded yet", showarrow=False, xref="paper", yref="paper", x=0.5, y=0.5)
+        fig.update_layout(title="Average Total Cost per Crawl", plot_bgcolor='white', paper_bgcolor='white')
+        return fig
+    history['university'] = history['university'].replace('*', 'All universities')
+    fig = px.line(
+        history,
+        x='crawl_date',
+        y='avg_cost',
+        color='university',
+        markers=True,
+        hover_data={'programs': True, 'min_cost': ':,.0f', 'max_cost': ':,.0f'},
+        title='Average Total Cost per Crawl',
+        labels={'crawl_date': 'Crawl Date', 'avg_cost': 'Average Total Cost (Baht)', 'university': 'University'},
+        color_discrete_sequence=px.colors.qualitative.Set1,
+    )
+    fig.update_layout(
+        legend=dict(orientation='h', yanchor='top', y=-0.2, xanchor='center', x=0.5),
+        plot_bgcolor='white',
+        paper_bgcolor='white'
+    )
+    return fig
+
+
+# --- 6. Page layouts (built lazily on first visit, see get_page_layout) ---
+def build_home_layout():
+    """Build the home page: dataset counts and cost overview charts."""
+    px = plotly_express()
+
+    return html.Div([
+        dbc.Row([
+            dbc.Col([
+                html.H1("Welcome to University Programs Dashboard", className="text-center mb-4"),
+                # --- Added Summary Card Below Header ---
+                                    dbc.Row([
+                            dbc.Col([
+                                dbc.Card([
+                                    dbc.CardBody([
+                                        html.H3(f"{len(ai_programs_df)}", className="text-primary"),
+                                        html.P("AI Engineering Programs")
+                                    ])
+                                ], className="text-center")
+                            ], md=6),
+                            dbc.Col([
+                                dbc.Card([
+                                    dbc.CardBody([
+                                        html.H3(f"{len(coe_programs_df)}", className="text-success"),
+                                        html.P("Computer Engineering Programs")
+                                    ])
+                                ], className="text-center")
+                            ], md=6),
+                        ]),
+
+                dbc.Row([
+                    dbc.Col([
+                        dbc.Card([
+                            dbc.CardHeader(html.H4("Cost Overview - AI Engineering", className="mb-0")),
+                            dbc.CardBody([
+                                dcc.Graph(
+                                    id='home-ai-cost-graph',
+                                    figure=px.bar(
+                                        ai_programs_df.sort_values(by="Total program cost (num)", ascending=False),
+                                        x="University",
+                                        y="Total program cost (num)",
+                                        title='Total Program Cost (AI Engineering)',
+                                        labels={
+                                            "Total program cost (num)": "Total Cost (Baht)",
+                                            "University": ""
+                                        },
+                                        color="University",
+                                        color_discrete_sequence=px.colors.qualitative.Set1,
+                                    ).update_layout(
+                                        xaxis_tickangle=-45,
+                                        height=500,
+                                        showlegend=False,
+                                        xaxis=dict(showticklabels=False),
+                                        # --- Set background colors to white ---
+                                        plot_bgcolor='white',
+                                        paper_bgcolor='white'
+                                        # --- End of background color setting ---
+                                    ).update_traces(),
+                                    config={'displayModeBar': False}
+                                ),
+                                html.P("Showing all AI Engineering programs sorted by cost.", className="text-muted small mt-2")
+                            ], style={'backgroundColor': 'white'}), # Set card body background to white
+                        ], className="mb-4 shadow rounded-3", style={'backgroundColor': 'white'}) # Set card background to white
+                    ], md=6),
+                    dbc.Col([
+                        dbc.Card([
+                            dbc.CardHeader(html.H4("Cost Overview - Computer Engineering", className="mb-0")),
+                            dbc.CardBody([
+                                dcc.Graph(
+                                    id='home-coe-cost-graph',
+                                    figure=px.bar(
+                                        coe_programs_df.sort_values(by="Total program cost (num)", ascending=False).head(10),
+                                        x='University',
+                                        y='Total program cost (num)',
+                                        title='Top 10 Universities - Total Program Cost (Computer Engineering)',
+                                        labels={
+                                            'Total program cost (num)': 'Total Cost (Baht)',
+                                            'University': ''
+                                        },
+                                        color="University",
+                                        color_discrete_sequence=px.colors.qualitative.Set1,
+                                    ).update_layout(
+                                        xaxis_tickangle=-45,
+                                        height=500,
+                                        showlegend=False,
+                                        xaxis=dict(showticklabels=False),
+                                         # --- Set background colors to white ---
+                                        plot_bgcolor='white',
+                                        paper_bgcolor='white'
+                                        # --- End of background color setting ---
+                                    ).update_traces(),
+                                    config={'displayModeBar': False}
+                                ),
+                                html.P("Showing the top 10 universities by program cost.", className="text-muted small mt-2")
+                            ], style={'backgroundColor': 'white'}), # Set card body background to white
+                        ], className="mb-4 shadow rounded-3", style={'backgroundColor': 'white'}) # Set card background to white
+                    ], md=6),
+                ]),
+            ])
         ])
     ])
-])
 
 
-ai_programs_layout = html.Div([
-    html.H2("AI Engineering Programs", className="mb-4 text-center"),
-    create_summary_stats('ai'),
-    create_program_filters('ai', ai_programs_df),
-    # --- Use the modified chart component ---
-    create_program_charts('ai'),
-    # --- END OF MODIFICATION ---
-    create_program_table('ai')
-])
+def build_ai_programs_layout():
+    """Build the AI Engineering programs page."""
+    return html.Div([
+        html.H2("AI Engineering Programs", className="mb-4 text-center"),
+        create_summary_stats('ai'),
+        create_program_filters('ai', ai_programs_df),
+        # --- Use the modified chart component ---
+        create_program_charts('ai'),
+        create_cost_distribution_chart('ai'),
+        # --- END OF MODIFICATION ---
+        create_cost_history_chart('ai'),
+        create_program_table('ai')
+    ])
 
 
 # --- FIXED COE LAYOUT TO USE CONSISTENT HELPER ---
-coe_programs_layout = html.Div([
-    html.H2("Computer Engineering Programs", className="mb-4 text-center"),
-    create_summary_stats('coe'),
-    create_program_filters('coe', coe_programs_df),
-    # --- Use the modified chart component for COE too ---
-    create_program_charts('coe'),
-    # --- END OF MODIFICATION ---
-    create_program_table('coe')
-])
+def build_coe_programs_layout():
+    """Build the Computer Engineering programs page."""
+    return html.Div([
+        html.H2("Computer Engineering Programs", className="mb-4 text-center"),
+        create_summary_stats('coe'),
+        create_program_filters('coe', coe_programs_df),
+        # --- Use the modified chart component for COE too ---
+        create_program_charts('coe'),
+        create_cost_distribution_chart('coe'),
+        # --- END OF MODIFICATION ---
+        create_cost_history_chart('coe'),
+        create_program_table('coe')
+    ])
 # --- END OF FIX ---
 
 
+PLANNER_DISCIPLINES = {'AI Engineering': 'ai', 'Computer Engineering': 'coe'}
+
+
+def build_planner_layout():
+    """Build the tuition budget planner page."""
+    return html.Div([
+        html.H2("Tuition Budget Planner", className="mb-2 text-center"),
+        html.P("Enter your budget and a scenario to see which programs fit, cheapest first.",
+               className="text-center text-muted mb-4"),
+        dbc.Card([
+            dbc.CardBody([
+                dbc.Row([
+                    dbc.Col([
+                        html.Label("Total budget (Baht):", className="fw-bold"),
+                        dcc.Input(id='planner-budget', type='number', min=0, step=10000, value=400000,
+                                  debounce=True, className="form-control"),
+                    ], md=3),
+                    dbc.Col([
+                        html.Label("Number of terms:", className="fw-bold"),
+                        dcc.Slider(id='planner-terms', min=1, max=12, step=1, value=8,
+                                   marks={n: str(n) for n in (1, 4, 8, 12)},
+                                   tooltip={"placement": "bottom", "always_visible": True}),
+                    ], md=3),
+                    dbc.Col([
+                        html.Label("Scholarship / discount (%):", className="fw-bold"),
+                        dcc.Slider(id='planner-discount', min=0, max=100, step=5, value=0,
+                                   marks={n: f'{n}%' for n in (0, 50, 100)},
+                                   tooltip={"placement": "bottom", "always_visible": True}),
+                    ], md=3),
+                    dbc.Col([
+                        html.Label("Tuition increase per year (%):", className="fw-bold"),
+                        dcc.Input(id='planner-inflation', type='number', min=0, max=50, step=0.5, value=0,
+                                  debounce=True, className="form-control"),
+                    ], md=3),
+                ], className="mb-3"),
+                dbc.Checklist(
+                    id='planner-disciplines',
+                    options=[{'label': label, 'value': label} for label in PLANNER_DISCIPLINES],
+                    value=list(PLANNER_DISCIPLINES), inline=True,
+                ),
+            ])
+        ], className="mb-3"),
+        html.H5(id='planner-summary', className="text-center mb-3"),
+        dbc.Card([
+            dbc.CardBody([dcc.Graph(id='planner-curve', config={'displayModeBar': False})]),
+        ], className="mb-4 shadow rounded-3"),
+        dbc.Card([
+            dbc.CardHeader(html.H5("Programs within budget", className="mb-0")),
+            dbc.CardBody([html.Div(id='planner-results')]),
+        ], className="mb-4 shadow rounded-3"),
+    ])
+
+
+def build_crawl_health_layout():
+    """Build the crawl health page: per-run failure rates and latency percentiles from the crawl trace."""
+    return html.Div([
+        html.H2("Crawl Health", className="mb-2 text-center"),
+        html.P(f"Per-URL trace records from main.py, pipeline.py and crawl_engine.py ({TRACE_PATH}).",
+               className="text-center text-muted mb-4"),
+        dcc.Interval(id='crawl-health-refresh', interval=30 * 1000),
+        dbc.Card([
+            dbc.CardHeader(html.H5("Runs", className="mb-0")),
+            dbc.CardBody([html.Div(id='crawl-health-runs')]),
+        ], className="mb-4 shadow rounded-3"),
+        dbc.Card([
+            dbc.CardBody([dcc.Graph(id='crawl-health-failures', config={'displayModeBar': False})]),
+        ], className="mb-4 shadow rounded-3"),
+        dbc.Card([
+            dbc.CardHeader(dbc.Row([
+                dbc.Col(html.H5("Where the time goes", className="mb-0")),
+                dbc.Col(dcc.Dropdown(id='crawl-health-run', placeholder="Select run", clearable=False), md=5),
+            ], align="center")),
+            dbc.CardBody([dcc.Graph(id='crawl-health-latency', config={'displayModeBar': False})]),
+        ], className="mb-4 shadow rounded-3"),
+    ])
+
+
+PAGE_BUILDERS = {
+    '/': build_home_layout,
+    '/ai-programs': build_ai_programs_layout,
+    '/coe-programs': build_coe_programs_layout,
+    '/planner': build_planner_layout,
+    '/crawl-health': build_crawl_health_layout,
+}
+_page_layouts = {}
+_page_layouts_lock = threading.Lock()
+
+
+def get_page_layout(pathname):
+    """Return the layout for a route, building and caching it on the first hit."""
+    if pathname not in PAGE_BUILDERS:
+        pathname = '/'
+    layout = _page_layouts.get(pathname)
+    if layout is None:
+        with _page_layouts_lock:
+            layout = _page_layouts.get(pathname)
+            if layout is None:
+                with startup.phase(f'build layout {pathname}'):
+                    layout = PAGE_BUILDERS[pathname]()
+                _page_layouts[pathname] = layout
+    return layout
+
+
 # --- 7. Main layout with URL routing ---
 app.layout = html.Div([
     dcc.Location(id='url', refresh=False),
@@ -353,12 +840,195 @@ app.layout = html.Div([
               [Input('url', 'pathname')])
 def display_page(pathname):
     """Display the appropriate page layout based on the URL."""
-    if pathname == '/ai-programs':
-        return ai_programs_layout
-    elif pathname == '/coe-programs':
-        return coe_programs_layout
-    else:
-        return home_layout
+    refresh_data_if_changed()
+    return get_page_layout(pathname)
+
+
+@lru_cache(maxsize=1)
+def _budget_planner(generation):
+    return BudgetPlanner({label: ai_programs_df if key == 'ai' else coe_programs_df
+                          for label, key in PLANNER_DISCIPLINES.items()})
+
+
+def budget_planner():
+    """Planner over every program of the currently loaded data (rebuilt once per data reload)."""
+    return _budget_planner(_data_generation)
+
+
+@app.callback(
+    [Output('planner-summary', 'children'),
+     Output('planner-curve', 'figure'),
+     Output('planner-results', 'children')],
+    [Input('planner-budget', 'value'),
+     Input('planner-terms', 'value'),
+     Input('planner-discount', 'value'),
+     Input('planner-inflation', 'value'),
+     Input('planner-disciplines', 'value')]
+)
+def update_planner(budget, terms, discount_pct, inflation_pct, disciplines):
+    """Evaluate the budget scenario across all programs and list the affordable ones."""
+    planner = budget_planner()
+    budget = float(budget or 0)
+    terms, discount_pct, inflation_pct = int(terms or 8), float(discount_pct or 0), float(inflation_pct or 0)
+    disciplines = disciplines or []  # Every box unchecked selects no programs, not all of them
+    started = time.perf_counter()
+    results, affordable = planner.evaluate(budget, terms, discount_pct, inflation_pct, disciplines)
+    elapsed = (time.perf_counter() - started) * 1000
+    selected = planner.discipline_mask(disciplines)
+    summary = (f"{affordable} of {int(selected.sum())} programs fit {budget:,.0f} Baht over {terms} terms "
+               f"(evaluated in {elapsed:.1f} ms)")
+
+    # How many programs fit as the budget changes, for the same scenario
+    projected = planner.projected_costs(terms, discount_pct, inflation_pct)[selected]
+    top = max(budget * 2, float(projected.max(initial=1)))
+    budgets = np.linspace(0, top, 200)
+    counts = planner.affordability_curve(budgets, terms, discount_pct, inflation_pct, disciplines)
+    curve = go.Figure(go.Scatter(x=budgets, y=counts, mode='lines', line_shape='hv',
+                                 hovertemplate='%{x:,.0f} Baht: %{y} programs<extra></extra>'))
+    curve.add_vline(x=budget, line_dash='dash', line_color='rgb(228,26,28)')
+    curve.update_layout(title='Affordable Programs by Budget', xaxis_title='Total budget (Baht)',
+                        yaxis_title='Number of Programs', showlegend=False)
+
+    if results.empty:
+        return summary, curve, html.P("No programs fit this budget.", className="text-center text-muted")
+    table_data = results.assign(**{
+        column: results[column].map('{:,.0f} Baht'.format) for column in ('Per-term cost', 'Projected cost', 'Headroom')
+    })
+    table = dash_table.DataTable(
+        data=table_data.to_dict('records'),
+        columns=[{"name": col, "id": col} for col in table_data.columns if col != 'Link'],
+        style_table={'overflowX': 'auto'},
+        style_cell={'textAlign': 'left', 'padding': '8px', 'whiteSpace': 'normal', 'height': 'auto', 'lineHeight': '1.4'},
+        style_header={'backgroundColor': 'rgb(230, 230, 230)', 'fontWeight': 'bold'},
+        page_size=10,
+    )
+    return summary, curve, table
+
+
+_trace_cache = {'key': object(), 'traces': None}  # Sentinel key: the first call always reads the log
+
+
+def load_crawl_traces():
+    """Trace records of every run, re-read only when the trace log has changed."""
+    key = (os.path.getmtime(TRACE_PATH), os.path.getsize(TRACE_PATH)) if os.path.exists(TRACE_PATH) else None
+    if key != _trace_cache['key']:
+        _trace_cache['traces'] = read_traces(TRACE_PATH)
+        _trace_cache['key'] = key
+    return _trace_cache['traces']
+
+
+@app.callback(
+    [Output('crawl-health-runs', 'children'),
+     Output('crawl-health-failures', 'figure'),
+     Output('crawl-health-run', 'options'),
+     Output('crawl-health-run', 'value')],
+    [Input('crawl-health-refresh', 'n_intervals')],
+    [State('crawl-health-run', 'value')]
+)
+def update_crawl_health_runs(_, selected_run):
+    """Refresh the run table, the per-run failure chart and the run picker from the trace log."""
+    health = run_health(load_crawl_traces())
+    if health.empty:
+        empty_fig = go.Figure()
+        empty_fig.add_annotation(text="No crawl traces yet", showarrow=False, xref="paper", yref="paper", x=0.5, y=0.5)
+        return html.P("No crawl traces recorded yet.", className="text-center text-muted"), empty_fig, [], None
+
+    table_data = health.assign(
+        started=health['started'].dt.strftime('%Y-%m-%d %H:%M'),
+        failure_rate=(health['failure_rate'] * 100).map('{:.1f}%'.format),
+    )
+    table = dash_table.DataTable(
+        data=table_data.to_dict('records'),
+        columns=[{"name": col.replace('_', ' '), "id": col} for col in table_data.columns],
+        style_table={'overflowX': 'auto'},
+        style_cell={'textAlign': 'left', 'padding': '8px'},
+        style_header={'backgroundColor': 'rgb(230, 230, 230)', 'fontWeight': 'bold'},
+        page_size=10,
+    )
+
+    chronological = health.sort_values('started')
+    failures_fig = go.Figure([
+        go.Bar(x=chronological['run'], y=chronological['failure_rate'], name='Failure rate', yaxis='y'),
+        go.Scatter(x=chronological['run'], y=chronological['fetch_p90_ms'], name='p90 fetch (ms)',
+                   mode='lines+markers', yaxis='y2'),
+    ])
+    failures_fig.update_layout(
+        title='Failure Rate and p90 Fetch Time per Run',
+        yaxis=dict(title='Failure rate', tickformat='.0%', rangemode='tozero'),
+        yaxis2=dict(title='p90 fetch (ms)', overlaying='y', side='right', rangemode='tozero'),
+        xaxis=dict(title='Run', type='category'),
+        legend=dict(orientation='h', yanchor='top', y=-0.3, xanchor='center', x=0.5),
+    )
+
+    options = [{'label': f"{row.run} ({row.source}, {row.pages} pages)", 'value': row.run}
+               for row in health.itertuples()]
+    if selected_run not in set(health['run']):
+        selected_run = health['run'].iloc[0]
+    return table, failures_fig, options, selected_run
+
+
+@app.callback(
+    Output('crawl-health-latency', 'figure'),
+    [Input('crawl-health-run', 'value')]
+)
+def update_crawl_health_latency(run_id):
+    """Latency percentiles per crawl phase (queue, throttle, fetch, DOM-ready, parse) for one run."""
+    px = plotly_express()
+    traces = load_crawl_traces()
+    percentiles = latency_percentiles(traces, run_id) if run_id else pd.DataFrame()
+    if percentiles.empty:
+        fig = go.Figure()
+        fig.add_annotation(text="No timings for this run", showarrow=False, xref="paper", yref="paper", x=0.5, y=0.5)
+        return fig
+    outcomes = traces.loc[traces['run'] == run_id, 'outcome'].value_counts()
+    fig = px.bar(
+        percentiles, x='phase', y='ms', color='percentile', barmode='group',
+        title='Latency Percentiles per Phase — ' + ', '.join(f"{name}: {count}" for name, count in outcomes.items()),
+        labels={'phase': 'Phase', 'ms': 'Milliseconds', 'percentile': 'Percentile'},
+    )
+    fig.update_layout(legend=dict(orientation='h', yanchor='top', y=-0.2, xanchor='center', x=0.5))
+    return fig
+
+
+@app.server.route('/_callback-stats')
+def callback_stats():
+    """Single-flight and default-state cache counters for the filter callbacks."""
+    return jsonify(callback_coalescer.stats())
+
+
+@app.server.route('/_startup-report')
+def startup_report():
+    """Startup phase timings as JSON, including lazy layout builds done so far."""
+    return jsonify(startup.phases)
+
+
+@app.server.route('/export/<program_type>.<fmt>')
+def export_programs(program_type, fmt):
+    """Stream the filtered table as CSV or XLSX.
+
+    Query args mirror the page filters: university (repeatable), min_cost, max_cost, sort, q.
+    They are parsed exactly like the JSON API's, so both return the same rows for a query string.
+    """
+    if program_type not in ('ai', 'coe') or fmt not in EXPORT_MIMETYPES:
+        abort(404)
+    if fmt == 'xlsx' and not xlsx_available():
+        return "XLSX export needs the openpyxl package (pip install openpyxl)", 501
+    try:
+        filters = parse_filters(request.args)
+    except ApiError as e:
+        return str(e), e.status
+    refresh_data_if_changed()
+    df, positions = filtered_positions(program_type, **filters)
+    return Response(
+        stream_export(df, positions, fmt),
+        mimetype=EXPORT_MIMETYPES[fmt],
+        headers={'Content-Disposition': f'attachment; filename="{program_type}_programs.{fmt}"'},
+    )
+
+
+# Read-only JSON API for other teams (/api/v1/<ai|coe>/programs|universities|stats)
+api_blueprint = create_api_blueprint(filtered_positions, lambda: _data_generation, refresh=refresh_data_if_changed)
+app.server.register_blueprint(api_blueprint)
 
 
 # --- Callbacks for AI Programs Page ---
@@ -370,11 +1040,13 @@ def display_page(pathname):
      Output('ai-max-cost', 'children')],
     [Input('ai-university-filter', 'value'),
      Input('ai-cost-range', 'value'),
-     Input('ai-sort', 'value')]
+     Input('ai-sort', 'value'),
+     Input('ai-search', 'value')]
 )
-def update_ai_summary_stats(selected_universities, cost_range, sort_by):
+@callback_coalescer(default_args=lambda: default_filter_inputs('ai'))
+def update_ai_summary_stats(selected_universities, cost_range, sort_by, search_query=None):
     """Update the summary statistics cards for AI."""
-    filtered_df = filter_and_sort_data(ai_programs_df, selected_universities, cost_range, sort_by)
+    filtered_df = filter_program_data('ai', selected_universities, cost_range, sort_by, search_query)
     total_programs = len(filtered_df)
     if total_programs > 0:
         avg_cost = f"{filtered_df['Total program cost (num)'].mean():,.0f} Baht"
@@ -395,11 +1067,14 @@ def update_ai_summary_stats(selected_universities, cost_range, sort_by):
      Output('ai-university-bar', 'figure')],
     [Input('ai-university-filter', 'value'),
      Input('ai-cost-range', 'value'),
-     Input('ai-sort', 'value')] # Add sort input to ensure graph updates on sort
+     Input('ai-sort', 'value'), # Add sort input to ensure graph updates on sort
+     Input('ai-search', 'value')]
 )
-def update_ai_charts(selected_universities, cost_range, sort_by):
+@callback_coalescer(default_args=lambda: default_filter_inputs('ai'))
+def update_ai_charts(selected_universities, cost_range, sort_by, search_query=None):
     """Update the charts for AI. Cost Distribution uses distinct colors, Programs by University is blue."""
-    filtered_df = filter_and_sort_data(ai_programs_df, selected_universities, cost_range, sort_by)
+    px = plotly_express()
+    filtered_df = filter_program_data('ai', selected_universities, cost_range, sort_by, search_query)
 
     # --- Cost Distribution Chart (Comparison Bar Chart) ---
     if filtered_df.empty:
@@ -463,7 +1138,8 @@ def update_ai_charts(selected_universities, cost_range, sort_by):
             cost_fig.update_traces(marker_line_width=1, marker_line_color='rgb(200,200,200)')
 
     # --- Programs by University Chart (Blue Bars) ---
-    uni_counts = filtered_df['University'].value_counts().reset_index()
+    uni_counts = filtered_df['University'].value_counts()
+    uni_counts = uni_counts[uni_counts > 0].reset_index()  # Drop categories not in the filtered rows
     uni_counts.columns = ['University', 'Count']
 
     if uni_counts.empty:
@@ -503,17 +1179,19 @@ def update_ai_charts(selected_universities, cost_range, sort_by):
     Output('ai-table-container', 'children'),
     [Input('ai-university-filter', 'value'),
      Input('ai-cost-range', 'value'),
-     Input('ai-sort', 'value')]
+     Input('ai-sort', 'value'),
+     Input('ai-search', 'value')]
 )
-def update_ai_table(selected_universities, cost_range, sort_by):
+@callback_coalescer(default_args=lambda: default_filter_inputs('ai'))
+def update_ai_table(selected_universities, cost_range, sort_by, search_query=None):
     """Update the data table for AI to match COE page columns and wrap text."""
-    filtered_df = filter_and_sort_data(ai_programs_df, selected_universities, cost_range, sort_by)
+    filtered_df = filter_program_data('ai', selected_universities, cost_range, sort_by, search_query)
     if filtered_df.empty:
         return html.P("No programs match the selected filters.", className="text-center text-muted")
 
     # Select columns to display in the table to match COE page (Removed 'Program')
     display_columns = ['University', 'Course Name', 'Total program cost (num)', 'term']
-    table_data = filtered_df[display_columns].copy()
+    table_data = decode_text_columns(filtered_df[display_columns])
 
     # Format the numeric columns for display in the table
     table_data['Total program cost (num)'] = table_data['Total program cost (num)'].apply(lambda x: f"{x:,.0f} Baht")
@@ -544,6 +1222,44 @@ def update_ai_table(selected_universities, cost_range, sort_by):
 # --- END OF FIX ---
 
 
+@app.callback(
+    Output('ai-cost-history', 'figure'),
+    [Input('ai-university-filter', 'value')]
+)
+def update_ai_cost_history(selected_universities):
+    """Update the cost history chart for AI from the scrape-history store."""
+    return build_cost_history_figure('aie', selected_universities)
+
+
+@app.callback(
+    Output('ai-cost-distribution', 'figure'),
+    [Input('ai-university-filter', 'value'),
+     Input('ai-cost-range', 'value'),
+     Input('ai-search', 'value'),
+     Input('ai-distribution-view', 'value'),
+     Input('ai-distribution-scale', 'value'),
+     Input('ai-distribution-mode', 'value')]
+)
+@callback_coalescer(default_args=lambda: (*default_filter_inputs('ai')[:2], None, 'total', 'linear', 'histogram'))
+def update_ai_cost_distribution(selected_universities, cost_range, search_query, view, scale, mode):
+    """Update the AI cost histogram / ECDF from the precomputed bins."""
+    return build_cost_distribution_figure('ai', selected_universities, cost_range, search_query, view, scale, mode)
+
+
+@app.callback(
+    [Output('ai-export-csv', 'href'),
+     Output('ai-export-xlsx', 'href')],
+    [Input('ai-university-filter', 'value'),
+     Input('ai-cost-range', 'value'),
+     Input('ai-sort', 'value'),
+     Input('ai-search', 'value')]
+)
+def update_ai_export_links(selected_universities, cost_range, sort_by, search_query=None):
+    """Point the AI download buttons at the current filter state."""
+    return tuple(export_href('ai', fmt, selected_universities, cost_range, sort_by, search_query)
+                 for fmt in ('csv', 'xlsx'))
+
+
 # --- Callbacks for Computer Engineering Page ---
 
 @app.callback(
@@ -553,11 +1269,13 @@ def update_ai_table(selected_universities, cost_range, sort_by):
      Output('coe-max-cost', 'children')],
     [Input('coe-university-filter', 'value'),
      Input('coe-cost-range', 'value'),
-     Input('coe-sort', 'value')]
+     Input('coe-sort', 'value'),
+     Input('coe-search', 'value')]
 )
-def update_coe_summary_stats(selected_universities, cost_range, sort_by):
+@callback_coalescer(default_args=lambda: default_filter_inputs('coe'))
+def update_coe_summary_stats(selected_universities, cost_range, sort_by, search_query=None):
     """Update the summary statistics cards for COE."""
-    filtered_df = filter_and_sort_data(coe_programs_df, selected_universities, cost_range, sort_by)
+    filtered_df = filter_program_data('coe', selected_universities, cost_range, sort_by, search_query)
     total_programs = len(filtered_df)
     if total_programs > 0:
         avg_cost = f"{filtered_df['Total program cost (num)'].mean():,.0f} Baht"
@@ -578,11 +1296,14 @@ def update_coe_summary_stats(selected_universities, cost_range, sort_by):
      Output('coe-university-bar', 'figure')],
     [Input('coe-university-filter', 'value'),
      Input('coe-cost-range', 'value'),
-     Input('coe-sort', 'value')] # Add sort input to ensure graph updates on sort
+     Input('coe-sort', 'value'), # Add sort input to ensure graph updates on sort
+     Input('coe-search', 'value')]
 )
-def update_coe_charts(selected_universities, cost_range, sort_by):
+@callback_coalescer(default_args=lambda: default_filter_inputs('coe'))
+def update_coe_charts(selected_universities, cost_range, sort_by, search_query=None):
     """Update the charts for COE. Cost Distribution now shows top universities."""
-    filtered_df = filter_and_sort_data(coe_programs_df, selected_universities, cost_range, sort_by)
+    px = plotly_express()
+    filtered_df = filter_program_data('coe', selected_universities, cost_range, sort_by, search_query)
 
     # --- Cost Distribution Chart (Now a Comparison Bar Chart) ---
     if filtered_df.empty:
@@ -648,7 +1369,8 @@ def update_coe_charts(selected_universities, cost_range, sort_by):
             cost_fig.update_traces(marker_line_width=1, marker_line_color='rgb(200,200,200)')
 
     # --- Programs by University Chart (Bar Chart) - Single Blue Color ---
-    uni_counts = filtered_df['University'].value_counts().reset_index()
+    uni_counts = filtered_df['University'].value_counts()
+    uni_counts = uni_counts[uni_counts > 0].reset_index()  # Drop categories not in the filtered rows
     uni_counts.columns = ['University', 'Count']
 
     if uni_counts.empty:
@@ -688,17 +1410,19 @@ def update_coe_charts(selected_universities, cost_range, sort_by):
     Output('coe-table-container', 'children'),
     [Input('coe-university-filter', 'value'),
      Input('coe-cost-range', 'value'),
-     Input('coe-sort', 'value')]
+     Input('coe-sort', 'value'),
+     Input('coe-search', 'value')]
 )
-def update_coe_table(selected_universities, cost_range, sort_by):
+@callback_coalescer(default_args=lambda: default_filter_inputs('coe'))
+def update_coe_table(selected_universities, cost_range, sort_by, search_query=None):
     """Update the data table for COE with text wrapping and consistent columns."""
-    filtered_df = filter_and_sort_data(coe_programs_df, selected_universities, cost_range, sort_by)
+    filtered_df = filter_program_data('coe', selected_universities, cost_range, sort_by, search_query)
     if filtered_df.empty:
         return html.P("No programs match the selected filters.", className="text-center text-muted")
 
     # Select columns to display in the table (matches AI now)
     display_columns = ['University', 'Course Name', 'Total program cost (num)', 'term']
-    table_data = filtered_df[display_columns].copy()
+    table_data = decode_text_columns(filtered_df[display_columns])
 
     # Format currency columns for display
     table_data['Total program cost (num)'] = table_data['Total program cost (num)'].apply(lambda x: f"{x:,.0f} Baht")
@@ -729,6 +1453,65 @@ def update_coe_table(selected_universities, cost_range, sort_by):
 # --- END OF FIX ---
 
 
+@app.callback(
+    Output('coe-cost-history', 'figure'),
+    [Input('coe-university-filter', 'value')]
+)
+def update_coe_cost_history(selected_universities):
+    """Update the cost history chart for COE from the scrape-history store."""
+    return build_cost_history_figure('coe', selected_universities)
+
+
+@app.callback(
+    Output('coe-cost-distribution', 'figure'),
+    [Input('coe-university-filter', 'value'),
+     Input('coe-cost-range', 'value'),
+     Input('coe-search', 'value'),
+     Input('coe-distribution-view', 'value'),
+     Input('coe-distribution-scale', 'value'),
+     Input('coe-distribution-mode', 'value')]
+)
+@callback_coalescer(default_args=lambda: (*default_filter_inputs('coe')[:2], None, 'total', 'linear', 'histogram'))
+def update_coe_cost_distribution(selected_universities, cost_range, search_query, view, scale, mode):
+    """Update the COE cost histogram / ECDF from the precomputed bins."""
+    return build_cost_distribution_figure('coe', selected_universities, cost_range, search_query, view, scale, mode)
+
+
+@app.callback(
+    [Output('coe-export-csv', 'href'),
+     Output('coe-export-xlsx', 'href')],
+    [Input('coe-university-filter', 'value'),
+     Input('coe-cost-range', 'value'),
+     Input('coe-sort', 'value'),
+     Input('coe-search', 'value')]
+)
+def update_coe_export_links(selected_universities, cost_range, sort_by, search_query=None):
+    """Point the COE download buttons at the current filter state."""
+    return tuple(export_href('coe', fmt, selected_universities, cost_range, sort_by, search_query)
+                 for fmt in ('csv', 'xlsx'))
+
+
+startup.mark('register layout and callbacks')
+
+# Default states are precomputed after the first request rather than at import, so warming never
+# competes with cold start; the first visitors may still compute their page themselves (coalesced).
+_warm_lock = threading.Lock()
+_warm_started = False
+
+
+@app.server.before_request
+def warm_after_first_request():
+    global _warm_started
+    if _warm_started:
+        return
+    with _warm_lock:
+        if _warm_started:
+            return
+        _warm_started = True
+    threading.Thread(target=warm_default_states, daemon=True).start()
+
+
 # --- 9. Run the app ---
 if __name__ == '__main__':
+    print(startup.report())
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+from cleaning import DEFAULT_TERMS
+
+# Terms per academic year; inflation is applied once per year
+TERMS_PER_YEAR = 2
+# Columns of the planner's result table
+RESULT_COLUMNS = ['Discipline', 'University', 'Course Name', 'Per-term cost', 'Projected cost', 'Headroom', 'Link']
+
+
+def cost_factor(terms, inflation_pct=0.0, terms_per_year=TERMS_PER_YEAR):
+    """Sum of per-term price multipliers over `terms` terms with `inflation_pct` yearly increases."""
+    years = np.arange(terms) // terms_per_year
+    return float(np.sum((1 + inflation_pct / 100) ** years))
+
+
+class BudgetPlanner:
+    """
+    Tuition what-if scenarios over every program of several datasets at once.
+
+    Per-term costs are collected into one NumPy array at construction (from 'term', or
+    'Total program cost (num)' / DEFAULT_TERMS where a program has no per-term price). Any
+    scenario (terms × discount × yearly inflation) then scales every program by the same factor,
+    so evaluating it is one vectorized multiply and compare.
+    """
+
+    def __init__(self, datasets):
+        """`datasets` maps a discipline label to a cleaned program DataFrame."""
+        frames = []
+        for discipline, df in datasets.items():
+            term = pd.to_numeric(df['term'], errors='coerce')
+            per_term = term.fillna(df['Total program cost (num)'] / DEFAULT_TERMS)
+            frames.append(pd.DataFrame({
+                'Discipline': discipline,
+                'University': df['University'].astype(object).to_numpy(),
+                'Course Name': df['Course Name'].astype(object).to_numpy() if 'Course Name' in df else None,
+                'Link': df['Link'].to_numpy() if 'Link' in df else None,
+                'Per-term cost': per_term.to_numpy(dtype=float),
+            }))
+        programs = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=RESULT_COLUMNS)
+        programs = programs[np.isfinite(programs['Per-term cost'].to_numpy(dtype=float))].reset_index(drop=True)
+        self.programs = programs
+        self.per_term = programs['Per-term cost'].to_numpy(dtype=float)
+        self.disciplines = list(datasets)
+        self._discipline_codes = pd.Categorical(programs['Discipline'], categories=self.disciplines).codes
+
+    def __len__(self):
+        return len(self.per_term)
+
+    def projected_costs(self, terms=DEFAULT_TERMS, discount_pct=0.0, inflation_pct=0.0):
+        """Projected total cost of every program under one scenario."""
+        return self.per_term * (cost_factor(terms, inflation_pct) * (1 - discount_pct / 100))
+
+    def discipline_mask(self, disciplines=None):
+        """Programs of the given disciplines; None means every discipline and [] means none."""
+        if disciplines is None:
+            return np.ones(len(self.per_term), dtype=bool)
+        wanted = [self.disciplines.index(name) for name in disciplines if name in self.disciplines]
+        return np.isin(self._discipline_codes, wanted)
+
+    def evaluate(self, budget, terms=DEFAULT_TERMS, discount_pct=0.0, inflation_pct=0.0, disciplines=None, limit=100):
+        """
+        Programs that fit `budget` under one scenario, cheapest first.
+
+        Returns:
+            tuple: (DataFrame of at most `limit` programs with RESULT_COLUMNS, number of affordable programs).
+        """
+        projected = self.projected_costs(terms, discount_pct, inflation_pct)
+        affordable = np.flatnonzero(self.discipline_mask(disciplines) & (projected <= budget))
+        if limit is not None and len(affordable) > limit:
+            # Only the `limit` cheapest need a full sort
+            affordable_top = affordable[np.argpartition(projected[affordable], limit - 1)[:limit]]
+        else:
+            affordable_top = affordable
+        ranked = affordable_top[np.argsort(projected[affordable_top], kind='stable')]
+        result = self.programs.iloc[ranked].assign(**{
+            'Projected cost': projected[ranked],
+            'Headroom': budget - projected[ranked],
+        })
+        return result[RESULT_COLUMNS].reset_index(drop=True), len(affordable)
+
+    def affordability_curve(self, budgets, terms=DEFAULT_TERMS, discount_pct=0.0, inflation_pct=0.0, disciplines=None):
+        """Number of affordable programs for each budget in `budgets` (one sort + searchsorted)."""
+        projected = np.sort(self.projected_costs(terms, discount_pct, inflation_pct)[self.discipline_mask(disciplines)])
+        return np.searchsorted(projected, np.asarray(budgets, dtype=float), side='right')
@@ -0,0 +1,141 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from cleaning import clean_raw_frame
+from validation import quarantine_path, validate_costs
+
+# Remembers the content hash of every raw file already cleaned into the output directory
+MANIFEST_NAME = ".clean_manifest.json"
+# Bump when cleaning.py changes in a way that should re-clean every file
+CLEANING_VERSION = 4
+
+# Column types of the cleaned outputs
+CLEANED_DTYPES = {
+    "No": "Int64",
+    "University": "category",
+    "Program": "category",
+    "Course Name": "string",
+    "Course Type": "category",
+    "Link": "string",
+    "Cost": "string",
+    "CleanCosts": "float64",
+    "term": "float64",
+    "Total program cost": "float64",
+}
+
+
+def file_hash(path):
+    """SHA-256 of a file's content (plus CLEANING_VERSION)."""
+    digest = hashlib.sha256(f"v{CLEANING_VERSION}".encode())
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def find_raw_files(input_dir):
+    """Every raw_*.csv under input_dir (any depth, e.g. <year>/<discipline>/raw_coe.csv)."""
+    found = []
+    for root, _, files in os.walk(input_dir):
+        found += [os.path.join(root, name) for name in files if name.startswith("raw_") and name.endswith(".csv")]
+    return sorted(found)
+
+
+def output_path(raw_path, input_dir, output_dir, fmt):
+    relative = os.path.relpath(raw_path, input_dir)
+    directory, name = os.path.split(relative)
+    cleaned_name = "cleaned_" + name[len("raw_"):-len(".csv")] + f".{fmt}"
+    return os.path.join(output_dir, directory, cleaned_name)
+
+
+def clean_file(raw_path, out_path, fmt):
+    """Clean and validate one raw CSV and write it typed (runs in a worker process).
+
+    Rejected rows go to a quarantine CSV next to the output. Returns (rows, quarantined, seconds).
+    """
+    started = time.perf_counter()
+    cleaned, quarantine = validate_costs(clean_raw_frame(pd.read_csv(raw_path)))
+    cleaned = cleaned.astype({col: dtype for col, dtype in CLEANED_DTYPES.items() if col in cleaned.columns})
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    if fmt == "parquet":
+        cleaned.to_parquet(out_path, index=False)
+    else:
+        cleaned.to_csv(out_path, index=False)
+    quarantine.to_csv(quarantine_path(out_path), index=False, encoding="utf-8-sig")
+    return len(cleaned), len(quarantine), time.perf_counter() - started
+
+
+def _parquet_available():
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def clean_directory(input_dir, output_dir, fmt="parquet", workers=None, force=False):
+    """Clean every changed raw CSV under input_dir in parallel; returns a summary dict."""
+    if fmt == "parquet" and not _parquet_available():
+        print("⚠️ pyarrow is not installed, writing CSV instead of Parquet")
+        fmt = "csv"
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+
+    todo, skipped = [], 0
+    for raw_path in find_raw_files(input_dir):
+        key = os.path.relpath(raw_path, input_dir)
+        digest = file_hash(raw_path)
+        out_path = output_path(raw_path, input_dir, output_dir, fmt)
+        if not force and manifest.get(key, {}).get("sha256") == digest and os.path.exists(out_path):
+            skipped += 1
+            continue
+        todo.append((key, digest, raw_path, out_path))
+
+    cleaned, failed, rows, quarantined = 0, [], 0, 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(clean_file, raw_path, out_path, fmt): (key, digest, out_path)
+                   for key, digest, raw_path, out_path in todo}
+        for future in as_completed(futures):
+            key, digest, out_path = futures[future]
+            try:
+                n_rows, n_quarantined, seconds = future.result()
+            except Exception as e:
+                failed.append(key)
+                print(f"⛔ {key}: {e}")
+                continue
+            cleaned += 1
+            rows += n_rows
+            quarantined += n_quarantined
+            manifest[key] = {"sha256": digest, "output": os.path.relpath(out_path, output_dir),
+                             "rows": n_rows, "quarantined": n_quarantined}
+            print(f"✅ {key} → {out_path} ({n_rows} rows, {n_quarantined} quarantined, {seconds:.2f}s)")
+
+    os.makedirs(output_dir, exist_ok=True)
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    return {"cleaned": cleaned, "skipped_unchanged": skipped, "failed": failed, "rows": rows,
+            "quarantined": quarantined}
+
+
+# Clean years of crawls at once: python clean_batch.py data/history_raw data/cleaned
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Clean a directory of raw_*.csv crawl outputs in parallel.")
+    parser.add_argument("input_dir")
+    parser.add_argument("output_dir")
+    parser.add_argument("--format", choices=["parquet", "csv"], default="parquet")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: one per core)")
+    parser.add_argument("--force", action="store_true", help="re-clean files even if unchanged")
+    args = parser.parse_args()
+
+    started_at = time.perf_counter()
+    summary = clean_directory(args.input_dir, args.output_dir, args.format, args.workers, args.force)
+    print(f"{summary} in {time.perf_counter() - started_at:.1f}s")
@@ -0,0 +1,71 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# Placeholder older scraper versions wrote when a page has no <dt>ค่าใช้จ่าย</dt>
+COST_NOT_FOUND = 'ไม่พบ <dt>ค่าใช้จ่าย</dt>'
+# Other placeholders/error strings older raw files carry in the Cost column (current scrapes write nulls)
+LEGACY_COST_PLACEHOLDERS = ('ไม่พบ <dt>', 'ไม่พบ <dd>', 'Error scraping page')
+# Cost texts containing these phrases are per-term prices, otherwise the number is the whole program
+PER_TERM_KEYWORDS = ('ต่อภาคเรียน', 'บาท/เทอม')
+# Programs are assumed to run 8 terms (4 years) when converting between per-term and total cost
+DEFAULT_TERMS = 8
+
+NUMBER_PATTERN = re.compile(r'\d[\d,\.]*')
+
+
+def is_missing_cost(text):
+    """True for nulls and for placeholder/error strings left by older scraper versions."""
+    return pd.isna(text) or str(text).startswith(LEGACY_COST_PLACEHOLDERS)
+
+
+def extract_costs(text):
+    """Return every number in a cost text as a list of ints, or NaN if there is none."""
+    if is_missing_cost(text):
+        return np.nan
+    matches = NUMBER_PATTERN.findall(str(text))
+    if not matches:
+        return np.nan
+    return [int(re.sub(r'[,\.]', '', m)) for m in matches]
+
+
+def extract_max_cost(text):
+    """Return the largest number in a cost text, or NaN if there is none."""
+    costs = extract_costs(text)
+    if not isinstance(costs, list):
+        return np.nan
+    return max(costs)
+
+
+def term_and_total(cost_text, max_cost):
+    """Split a cost into (per-term cost, total program cost) using the per-term keywords."""
+    if pd.isna(max_cost):
+        return np.nan, np.nan
+    cost_text = str(cost_text)
+    if any(keyword in cost_text for keyword in PER_TERM_KEYWORDS):
+        return max_cost, max_cost * DEFAULT_TERMS
+    return round(max_cost / DEFAULT_TERMS), max_cost
+
+
+def clean_cost_record(record):
+    """Return a copy of one scraped record (dict with 'Cost') with CleanCosts, term and Total program cost."""
+    cost = record.get('Cost')
+    if is_missing_cost(cost):
+        cost = np.nan
+    max_cost = extract_max_cost(cost)
+    term, total = term_and_total(cost, max_cost)
+    return {**record, 'Cost': cost, 'CleanCosts': max_cost, 'term': term, 'Total program cost': total}
+
+
+def clean_raw_frame(df):
+    """Clean a raw_{prefix}.csv frame into the columns the dashboard reads.
+
+    Mirrors the cleaning cells of check..ipynb (max number per cost text, then 'term' and
+    'Total program cost' derived from it), except that missing costs stay missing instead of
+    being filled with the dataset's max; validation.py quarantines those rows.
+    """
+    cleaned = pd.DataFrame([clean_cost_record(record) for record in df.to_dict('records')], index=df.index)
+    if cleaned.empty:
+        return cleaned.reindex(columns=[*df.columns, 'CleanCosts', 'term', 'Total program cost'])
+    return cleaned
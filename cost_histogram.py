@@ -0,0 +1,104 @@
+import numpy as np
+
+# Number of histogram bins per view
+HISTOGRAM_BINS = 30
+# Cost column binned by each view
+VIEW_COLUMNS = {'total': 'Total program cost (num)', 'term': 'term'}
+SCALES = ('linear', 'log')
+# Column the dashboard's cost-range slider filters on
+RANGE_COLUMN = 'Total program cost (num)'
+
+
+def bin_edges(values, bins=HISTOGRAM_BINS, scale='linear'):
+    """Equal-width (linear) or equal-ratio (log) edges spanning the finite, positive-for-log values."""
+    values = values[np.isfinite(values)]
+    if scale == 'log':
+        values = values[values > 0]
+    if values.size == 0:
+        return np.linspace(0.0, 1.0, bins + 1)
+    low, high = values.min(), values.max()
+    if low == high:
+        low, high = (low / 2, high * 2) if scale == 'log' else (low - 0.5, high + 0.5)
+    return np.geomspace(low, high, bins + 1) if scale == 'log' else np.linspace(low, high, bins + 1)
+
+
+def bin_index(values, edges):
+    """Bin of each value (the last bin includes its right edge); -1 for values outside the edges or NaN."""
+    index = np.searchsorted(edges, values, side='right') - 1
+    index[values == edges[-1]] = len(edges) - 2
+    index[~np.isfinite(values) | (values < edges[0]) | (values > edges[-1])] = -1
+    return index
+
+
+class _Group:
+    """Rows of one university (or all rows) sorted by the range column, with prefix counts per bin."""
+
+    def __init__(self, range_values, bins_by_view, n_bins):
+        order = np.argsort(range_values, kind='stable')
+        self.sorted_range = range_values[order]
+        self.prefix = {}
+        for key, index in bins_by_view.items():
+            index = index[order]
+            one_hot = np.zeros((len(index), n_bins), dtype=np.int32)
+            inside = index >= 0
+            one_hot[np.flatnonzero(inside), index[inside]] = 1
+            # prefix[k] = per-bin counts of the first k rows in range-column order
+            self.prefix[key] = np.vstack([np.zeros((1, n_bins), dtype=np.int32), one_hot.cumsum(axis=0)])
+
+    def counts(self, key, cost_range):
+        if cost_range is None:
+            return self.prefix[key][-1]
+        start = np.searchsorted(self.sorted_range, cost_range[0], side='left')
+        stop = np.searchsorted(self.sorted_range, cost_range[1], side='right')
+        return self.prefix[key][stop] - self.prefix[key][start]
+
+
+class CostHistogram:
+    """
+    Cost histograms of one dataset, binned once at load time.
+
+    For every view ('total' or per-'term' cost) and scale ('linear' or 'log') the bin edges and
+    each row's bin are computed up front. Rows are grouped per university and sorted by total cost
+    with cumulative per-bin counts, so a university or cost-range filter is answered by two
+    searchsorted lookups and a subtraction instead of rebinning rows.
+    """
+
+    def __init__(self, df, bins=HISTOGRAM_BINS):
+        self.bins = bins
+        self.edges = {}
+        bins_by_view = {}
+        for view, column in VIEW_COLUMNS.items():
+            values = df[column].to_numpy(dtype=float)
+            for scale in SCALES:
+                edges = bin_edges(values, bins, scale)
+                self.edges[view, scale] = edges
+                bins_by_view[view, scale] = bin_index(values, edges)
+
+        range_values = df[RANGE_COLUMN].to_numpy(dtype=float)
+        self.categories = df['University'].cat.categories
+        codes = df['University'].cat.codes.to_numpy()
+        self._all = _Group(range_values, bins_by_view, bins)
+        self._by_code = {
+            code: _Group(range_values[codes == code], {key: index[codes == code] for key, index in bins_by_view.items()}, bins)
+            for code in np.unique(codes[codes >= 0])
+        }
+
+    def counts(self, selected_universities=None, cost_range=None, view='total', scale='linear'):
+        """(edges, counts) for the rows of `selected_universities` (all if empty) with total cost in `cost_range`."""
+        key = (view, scale)
+        cost_range = tuple(cost_range) if cost_range and len(cost_range) == 2 else None
+        if not selected_universities:
+            return self.edges[key], self._all.counts(key, cost_range)
+        codes = self.categories.get_indexer(selected_universities)
+        counts = np.zeros(self.bins, dtype=np.int64)
+        for code in codes[codes >= 0]:
+            group = self._by_code.get(code)
+            if group is not None:
+                counts += group.counts(key, cost_range)
+        return self.edges[key], counts
+
+    def counts_for_rows(self, df, view='total', scale='linear'):
+        """(edges, counts) of an arbitrary row subset (e.g. search results) on the precomputed edges."""
+        edges = self.edges[view, scale]
+        index = bin_index(df[VIEW_COLUMNS[view]].to_numpy(dtype=float), edges)
+        return edges, np.bincount(index[index >= 0], minlength=self.bins)
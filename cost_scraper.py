@@ -1,107 +1,181 @@
+import json
+import re
 import pandas as pd
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
 from bs4 import BeautifulSoup
 import time
-from webdriver_manager.chrome import ChromeDriverManager
+from urllib.parse import urljoin
 
-def scrape_costs_from_dataframe(input_df):
+from crawl_trace import CrawlTracer, elapsed_ms
+
+# <dt> labels on a program detail page that get their own typed column: label -> (column, type)
+DETAIL_FIELDS = {
+    "ค่าใช้จ่าย": ("ค่าใช้จ่าย", str),
+    "ชื่อหลักสูตร": ("Course Name", str),
+    "ชื่อหลักสูตรภาษาอังกฤษ": ("Course Name (EN)", str),
+    "ประเภทหลักสูตร": ("Course Type", str),
+    "วิทยาเขต": ("Campus", str),
+    "จำนวนรับ": ("Seats", int),
+}
+# A page missing any of these is marked 'partial'
+REQUIRED_FIELDS = ("ค่าใช้จ่าย", "ชื่อหลักสูตร")
+# <dt> labels of admission rounds start with this word, e.g. "รอบ 1 Portfolio"
+ROUND_LABEL_PREFIX = "รอบ"
+# Every column parse_program_details returns, in output order
+DETAIL_COLUMNS = [column for column, _ in DETAIL_FIELDS.values()] + [
+    "Admission Rounds", "Scrape Status", "Scrape Error", "Details",
+]
+
+NUMBER_PATTERN = re.compile(r"\d[\d,]*")
+
+
+def _parse_int(text):
+    match = NUMBER_PATTERN.search(text or "")
+    return int(match.group().replace(",", "")) if match else None
+
+
+def parse_program_details(html):
+    """
+    Extracts every <dt>/<dd> pair of a program detail page in one pass.
+
+    Args:
+        html (str): Page source of a program detail page.
+
+    Returns:
+        dict: One value per DETAIL_COLUMNS entry. Fields missing from the page are None (never a
+              placeholder string); 'Scrape Status' is 'ok' or 'partial' and 'Scrape Error' names
+              the missing required fields. 'Details' keeps all pairs as JSON, and admission rounds
+              are listed in 'Admission Rounds' (their seats are summed into 'Seats' when the page
+              has no total).
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    record = dict.fromkeys(DETAIL_COLUMNS)
+    pairs, rounds, round_seats = [], [], []
+    for dt in soup.find_all("dt"):
+        dd = dt.find_next_sibling("dd")
+        label = dt.get_text(" ", strip=True)
+        value = dd.get_text(" ", strip=True) if dd else None
+        pairs.append([label, value])
+        if label in DETAIL_FIELDS:
+            column, kind = DETAIL_FIELDS[label]
+            if record[column] is None and value:
+                record[column] = _parse_int(value) if kind is int else value
+        elif label.startswith(ROUND_LABEL_PREFIX):
+            rounds.append(label)
+            round_seats.append(_parse_int(value))
+
+    if record["Seats"] is None and any(seats is not None for seats in round_seats):
+        record["Seats"] = sum(seats for seats in round_seats if seats is not None)
+    record["Admission Rounds"] = "; ".join(rounds) or None
+    record["Details"] = json.dumps(pairs, ensure_ascii=False) if pairs else None
+
+    missing = [label for label in REQUIRED_FIELDS if record[DETAIL_FIELDS[label][0]] is None]
+    record["Scrape Status"] = "partial" if missing else "ok"
+    record["Scrape Error"] = f"ไม่พบ {', '.join(missing)}" if missing else None
+    return record
+
+
+def parse_search_results(html, prevent, base_url="https://www.mytcas.com/"):
+    """
+    Extracts program links from a search results page (div#results.t-result ul.t-programs).
+
+    Args:
+        html (str): Page source of the search results page.
+        prevent (str): Word that must appear in the result's <h3> (same pre-filter as main.py).
+        base_url (str): URL the page was loaded from, used to resolve relative links.
+
+    Returns:
+        tuple: (kept, skipped) lists of dicts. kept items have 'University', 'Program' and 'Link'.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    kept, skipped = [], []
+    for index, li in enumerate(soup.select("div#results.t-result ul.t-programs li")):
+        a_tag = li.find("a")
+        h3 = a_tag.find("h3") if a_tag else None
+        if not a_tag or not h3:
+            skipped.append({"ลำดับ": index + 1, "เหตุผล": "ไม่พบ <a> หรือ <h3>"})
+            continue
+        h3_text = h3.get_text(" ", strip=True)
+        if prevent not in h3_text:
+            skipped.append({"ลำดับ": index + 1, "h3_text": h3_text, "เหตุผล": f"ไม่มีคำว่า '{prevent}'"})
+            continue
+        strong = h3.find("strong")
+        spans = a_tag.find_all("span")
+        kept.append({
+            "University": spans[-1].get_text(strip=True) if spans else "ไม่พบชื่อมหาวิทยาลัย",
+            "Program": strong.get_text(strip=True) if strong else h3_text,
+            "Link": urljoin(base_url, a_tag.get("href", "")),
+        })
+    return kept, skipped
+
+
+def scrape_costs_from_dataframe(input_df, session=None, tracer=None):
     """
     Scrapes cost, course name, and course type information from program detail pages.
 
     Args:
         input_df (pd.DataFrame): DataFrame containing program links in a 'Link' column.
+        session (driver_pool.BrowserSession, optional): Browser to reuse (e.g. the one main.py
+            searched with). When omitted, a session is borrowed from the shared pool and the
+            pool is closed afterwards.
+        tracer (crawl_trace.CrawlTracer, optional): Where per-URL trace records go; a new
+            'cost_scraper' run is started when omitted.
 
     Returns:
-        pd.DataFrame: Original DataFrame with added 'ค่าใช้จ่าย', 'Course Name', and 'Course Type' columns.
+        pd.DataFrame: Original DataFrame with the DETAIL_COLUMNS added ('ค่าใช้จ่าย', 'Course Name',
+                      'Course Type', 'Seats', 'Scrape Status', ...). Missing values are nulls.
                       Note: 'Course Name' corresponds to 'ชื่อหลักสูตร',
                             'Course Type' corresponds to 'ประเภทหลักสูตร'.
     """
-    # ตั้งค่า ChromeDriver (headless ไม่เปิดหน้าต่าง)
-    options = Options()
-    options.add_argument('--headless')
-    options.add_argument('--disable-gpu')
-    options.add_argument('--no-sandbox') # Added for stability
-    options.add_argument('--disable-dev-shm-usage') # Added for stability
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-
-    try:
-        # คัดลอก DataFrame และเพิ่มคอลัมน์ใหม่สำหรับข้อมูลที่ scrape
-        df = input_df.copy()
-        # Initialize columns with empty strings or a placeholder
-        df["ค่าใช้จ่าย"] = ""
-        df["Course Name"] = ""  # New column for ชื่อหลักสูตร (in Thai)
-        df["Course Type"] = ""  # New column for ประเภทหลักสูตร
-
-        # Loop ตามลิงก์ - ใช้ชื่อคอลัมน์ภาษาอังกฤษ
-        for idx, row in df.iterrows():
-            url = row["Link"]
-            print(f"Scraping data for program {idx + 1}/{len(df)} from: {url}") # Optional: Progress indicator
-            try:
-                driver.get(url)
-                # เพิ่ม wait time หรือใช้ WebDriverWait ถ้าจำเป็น
-                time.sleep(3) # รอให้โหลด JavaScript
-
-                soup = BeautifulSoup(driver.page_source, "html.parser")
-
-                # --- Scrape ค่าใช้จ่าย ---
-                cost_dt = soup.find("dt", string="ค่าใช้จ่าย")
-                if cost_dt:
-                    cost_dd = cost_dt.find_next_sibling("dd")
-                    if cost_dd:
-                        df.at[idx, "ค่าใช้จ่าย"] = cost_dd.text.strip()
-                    else:
-                        df.at[idx, "ค่าใช้จ่าย"] = "ไม่พบ <dd> สำหรับ ค่าใช้จ่าย"
-                else:
-                    df.at[idx, "ค่าใช้จ่าย"] = "ไม่พบ <dt>ค่าใช้จ่าย</dt>"
-
-                # --- Scrape ชื่อหลักสูตร ---
-                # ตามตัวอย่าง ใช้ <dt>ชื่อหลักสูตร</dt>
-                name_dt = soup.find("dt", string="ชื่อหลักสูตร")
-                if name_dt:
-                    name_dd = name_dt.find_next_sibling("dd")
-                    if name_dd:
-                        df.at[idx, "Course Name"] = name_dd.text.strip()
-                    else:
-                        df.at[idx, "Course Name"] = "ไม่พบ <dd> สำหรับ ชื่อหลักสูตร"
-                else:
-                     # ถ้าไม่เจอ ลองหา <dt>ชื่อหลักสูตรภาษาอังกฤษ</dt> แทน?
-                     # name_dt_alt = soup.find("dt", string="ชื่อหลักสูตรภาษาอังกฤษ")
-                     # if name_dt_alt:
-                     #     name_dd_alt = name_dt_alt.find_next_sibling("dd")
-                     #     if name_dd_alt:
-                     #         df.at[idx, "Course Name"] = name_dd_alt.text.strip() + " (English Name)"
-                     #     else:
-                     #         df.at[idx, "Course Name"] = "ไม่พบ <dd> สำหรับ ชื่อหลักสูตรภาษาอังกฤษ"
-                     # else:
-                     df.at[idx, "Course Name"] = "ไม่พบ <dt>ชื่อหลักสูตร</dt>"
-
-                # --- Scrape ประเภทหลักสูตร ---
-                type_dt = soup.find("dt", string="ประเภทหลักสูตร")
-                if type_dt:
-                    type_dd = type_dt.find_next_sibling("dd")
-                    if type_dd:
-                        df.at[idx, "Course Type"] = type_dd.text.strip()
-                    else:
-                        df.at[idx, "Course Type"] = "ไม่พบ <dd> สำหรับ ประเภทหลักสูตร"
-                else:
-                    df.at[idx, "Course Type"] = "ไม่พบ <dt>ประเภทหลักสูตร</dt>"
-
-            except Exception as e:
-                # หากเกิดข้อผิดพลาดกับ URL นี้ ให้บันทึกข้อความ error ไว้ในทุกคอลัมน์ที่ scrape
-                error_msg = f"Error scraping page: {e}"
-                df.at[idx, "ค่าใช้จ่าย"] = error_msg
-                df.at[idx, "Course Name"] = error_msg
-                df.at[idx, "Course Type"] = error_msg
-                print(f"   Error for URL {url}: {e}") # Optional: Log the error
-
-    finally:
-        # ปิด browser
-        driver.quit()
-        print("WebDriver closed.") # Optional: Confirmation
+    if session is None:
+        from driver_pool import shared_pool
+        pool = shared_pool()
+        try:
+            with pool.session() as own_session:
+                return scrape_costs_from_dataframe(input_df, own_session, tracer)
+        finally:
+            # ปิด browser
+            pool.close()
+
+    from driver_pool import dom_ready_ms
+    if tracer is None:
+        tracer = CrawlTracer("cost_scraper")
+
+    # คัดลอก DataFrame และเพิ่มคอลัมน์ใหม่สำหรับข้อมูลที่ scrape (ค่าที่ไม่พบเป็น null จริง)
+    df = input_df.copy()
+    for column in DETAIL_COLUMNS:
+        df[column] = None
+
+    # Loop ตามลิงก์ - ใช้ชื่อคอลัมน์ภาษาอังกฤษ
+    for idx, row in df.iterrows():
+        url = row["Link"]
+        print(f"Scraping data for program {idx + 1}/{len(df)} from: {url}") # Optional: Progress indicator
+        trace = {}
+        try:
+            started = time.perf_counter()
+            driver = session.get(url)  # The pool restarts the browser every N pages
+            trace["fetch_ms"] = elapsed_ms(started)
+            trace["dom_ms"] = dom_ready_ms(driver)
+            # เพิ่ม wait time หรือใช้ WebDriverWait ถ้าจำเป็น
+            time.sleep(3) # รอให้โหลด JavaScript
+
+            # --- ดึงทุกคู่ <dt>/<dd> ในรอบเดียว ---
+            started = time.perf_counter()
+            html = driver.page_source
+            details = parse_program_details(html)
+            trace["parse_ms"] = elapsed_ms(started)
+            trace["bytes"] = len(html.encode("utf-8"))
+            for column, value in details.items():
+                df.at[idx, column] = value
+            tracer.record(url, "detail", details["Scrape Status"], retries=0, error=details["Scrape Error"], **trace)
+
+        except Exception as e:
+            # หากเกิดข้อผิดพลาดกับ URL นี้ ให้บันทึกไว้ในคอลัมน์สถานะ (คอลัมน์ข้อมูลยังเป็น null)
+            df.at[idx, "Scrape Status"] = "error"
+            df.at[idx, "Scrape Error"] = f"Error scraping page: {e}"
+            tracer.record(url, "detail", "error", retries=0, error=str(e), **trace)
+            print(f"   Error for URL {url}: {e}") # Optional: Log the error
 
+    df["Seats"] = df["Seats"].astype("Int64")
     return df
 
 # Example usage (if running this script directly):
@@ -0,0 +1,322 @@
+import argparse
+import asyncio
+import random
+import time
+import urllib.error
+import urllib.request
+from urllib.parse import quote, urlparse
+
+from crawl_trace import CrawlTracer, current_trace, elapsed_ms
+
+MYTCAS_BASE_URL = "https://www.mytcas.com/"
+# URL the mytcas.com search box navigates to after pressing Enter (see main.py)
+MYTCAS_SEARCH_URL = "https://www.mytcas.com/search?q={query}"
+USER_AGENT = "Mozilla/5.0 (compatible; TCAS-Dashboard crawler)"
+
+# HTTP statuses worth retrying; anything else is a permanent failure for that URL
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+
+class FetchError(Exception):
+    """A fetch failed. `retryable` says whether the scheduler should try the URL again."""
+
+    def __init__(self, message, retryable=True, status=None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.status = status
+
+
+class CrawlJob:
+    """One URL to crawl. `kind` selects how its page is handled ('search' or 'detail')."""
+
+    __slots__ = ("kind", "url", "meta", "attempts", "enqueued_at", "trace")
+
+    def __init__(self, kind, url, meta=None):
+        self.kind = kind
+        self.url = url
+        self.meta = meta or {}
+        self.attempts = 0
+        self.enqueued_at = None
+        self.trace = {}  # Timing fields for the crawl trace, summed over attempts
+
+    @property
+    def host(self):
+        return urlparse(self.url).netloc
+
+    def __repr__(self):
+        return f"CrawlJob({self.kind!r}, {self.url!r})"
+
+
+class TokenBucket:
+    """Token-bucket rate limiter: `rate` requests per second with bursts of up to `burst`."""
+
+    def __init__(self, rate, burst=1, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self._clock = clock
+        self._updated = clock()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        """Wait until a token is available and take it."""
+        async with self._lock:  # Waiters are served in arrival order
+            while True:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def backoff_delay(attempt, base=1.0, cap=30.0):
+    """Exponential backoff with full jitter: uniform in [0, min(cap, base * 2**attempt)]."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def _fetch_blocking(url, timeout):
+    request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            charset = response.headers.get_content_charset() or "utf-8"
+            return response.read().decode(charset, errors="replace")
+    except urllib.error.HTTPError as e:
+        raise FetchError(f"HTTP {e.code} for {url}", retryable=e.code in RETRYABLE_STATUS, status=e.code)
+    except (urllib.error.URLError, TimeoutError, ConnectionError) as e:
+        raise FetchError(f"{type(e).__name__} for {url}: {e}", retryable=True)
+
+
+async def http_fetch(url, timeout=30):
+    """Default fetcher: plain HTTP GET run in a worker thread.
+
+    Pages that need JavaScript can be crawled by passing a browser-backed fetcher to CrawlEngine.
+    """
+    return await asyncio.to_thread(_fetch_blocking, url, timeout)
+
+
+class CrawlEngine:
+    """Asyncio crawl scheduler shared by search pages and detail pages.
+
+    Jobs wait in a bounded work queue served by `concurrency` workers. Every request first takes a
+    token from its host's bucket, so all kinds of page share one politeness budget per host.
+    Retryable failures are re-queued after a jittered exponential backoff.
+
+    `on_page(job, html)` is awaited for every fetched page and may call `submit()` with follow-up
+    jobs (e.g. detail pages found on a search page). Follow-ups go to an unbounded frontier that
+    feeds the bounded queue, so a worker never blocks on its own queue.
+
+    With a `tracer` (crawl_trace.CrawlTracer) one record per URL is written once it succeeds or
+    gives up: queue wait, rate-limit wait, fetch time, handler time, bytes, retries and outcome.
+    A handler that finishes a page later (e.g. in another pipeline stage) calls defer_trace(job)
+    and then finish_trace(job, ...).
+    """
+
+    def __init__(self, on_page, fetch=http_fetch, concurrency=4, queue_size=100,
+                 rate_per_host=1.0, burst=2, max_retries=3, backoff_base=1.0, backoff_cap=30.0,
+                 timeout=30, tracer=None):
+        self.on_page = on_page
+        self.fetch = fetch
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.rate_per_host = rate_per_host
+        self.burst = burst
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.timeout = timeout
+        self.tracer = tracer
+        self.buckets = {}
+        self.stats = {"fetched": 0, "failed": 0, "retries": 0, "handler_errors": 0}
+        self.failures = []
+
+    def _bucket(self, host):
+        if host not in self.buckets:
+            self.buckets[host] = TokenBucket(self.rate_per_host, self.burst)
+        return self.buckets[host]
+
+    def submit(self, job):
+        """Schedule a job (non-blocking; safe to call from on_page)."""
+        self._outstanding += 1
+        job.enqueued_at = time.monotonic()
+        self._frontier.put_nowait(job)
+
+    async def _feed(self):
+        # Move jobs from the unbounded frontier into the bounded work queue (backpressure point)
+        while True:
+            job = await self._frontier.get()
+            await self._queue.put(job)
+
+    def defer_trace(self, job):
+        """Called from on_page: the handler will write this job's trace itself with finish_trace()."""
+        job.trace["deferred"] = True
+
+    def finish_trace(self, job, outcome, **fields):
+        """Write the trace record of a job (no-op without a tracer)."""
+        if self.tracer is None:
+            return
+        trace = {key: value for key, value in job.trace.items() if key != "deferred"}
+        trace.update(fields)
+        for key, value in trace.items():
+            if isinstance(value, float):
+                trace[key] = round(value, 1)
+        self.tracer.record(job.url, job.kind, outcome, retries=job.attempts - 1, **trace)
+
+    async def _retry_later(self, job, delay):
+        await asyncio.sleep(delay)
+        job.enqueued_at = time.monotonic()  # Backoff time is not queue wait
+        self._frontier.put_nowait(job)
+
+    def _finish(self):
+        self._outstanding -= 1
+        if self._outstanding == 0:
+            self._done.set()
+
+    async def _process(self, job):
+        """Fetch and handle one job; returns 'ok', 'retry' or 'failed'."""
+        trace = job.trace
+        if job.enqueued_at is not None:
+            trace["queue_ms"] = trace.get("queue_ms", 0.0) + (time.monotonic() - job.enqueued_at) * 1000
+        started = time.perf_counter()
+        await self._bucket(job.host).acquire()
+        trace["throttle_ms"] = trace.get("throttle_ms", 0.0) + elapsed_ms(started)
+        job.attempts += 1
+        started = time.perf_counter()
+        token = current_trace.set(trace)  # Lets the fetch function note() extra fields, e.g. DOM-ready time
+        try:
+            html = await asyncio.wait_for(self.fetch(job.url), timeout=self.timeout)
+        except Exception as e:
+            # Besides FetchError/timeouts, fetchers can raise e.g. IncompleteRead or a WebDriverException;
+            # anything without retryable=False is retried like a network error
+            trace["fetch_ms"] = elapsed_ms(started)
+            retryable = getattr(e, "retryable", True)
+            if retryable and job.attempts <= self.max_retries:
+                self.stats["retries"] += 1
+                delay = backoff_delay(job.attempts - 1, self.backoff_base, self.backoff_cap)
+                # Keep a reference so the pending retry is not garbage-collected
+                task = asyncio.create_task(self._retry_later(job, delay))
+                self._retry_tasks.add(task)
+                task.add_done_callback(self._retry_tasks.discard)
+                return "retry"
+            self.stats["failed"] += 1
+            self.failures.append((job, repr(e)))
+            self.finish_trace(job, "failed", status=getattr(e, "status", None), error=repr(e))
+            return "failed"
+        finally:
+            current_trace.reset(token)
+
+        trace["fetch_ms"] = elapsed_ms(started)
+        trace["bytes"] = len(html.encode("utf-8"))
+        self.stats["fetched"] += 1
+        started = time.perf_counter()
+        try:
+            await self.on_page(job, html)
+        except Exception as e:
+            self.stats["handler_errors"] += 1
+            self.failures.append((job, f"handler: {e!r}"))
+            self.finish_trace(job, "error", parse_ms=elapsed_ms(started), error=f"handler: {e!r}")
+            return "failed"
+        if not trace.get("deferred"):
+            self.finish_trace(job, "ok", parse_ms=elapsed_ms(started))
+        return "ok"
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            outcome = "failed"
+            try:
+                outcome = await self._process(job)
+            except Exception as e:
+                # A bug outside fetch/on_page (e.g. the trace write) must not kill the worker
+                self.stats["failed"] += 1
+                self.failures.append((job, f"engine: {e!r}"))
+            finally:
+                self._queue.task_done()
+                # Always settle the job, or run() would wait for it forever
+                if outcome != "retry":
+                    self._finish()
+
+    async def run(self, seeds):
+        """Crawl the seed jobs and everything they lead to; returns the stats dict."""
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._frontier = asyncio.Queue()
+        self._outstanding = 0
+        self._done = asyncio.Event()
+        self._retry_tasks = set()
+        for job in seeds:
+            self.submit(job)
+        if self._outstanding == 0:
+            return self.stats
+
+        tasks = [asyncio.create_task(self._feed())]
+        tasks += [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        started = time.monotonic()
+        try:
+            await self._done.wait()
+        finally:
+            tasks += self._retry_tasks
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self.stats["elapsed_s"] = round(time.monotonic() - started, 2)
+        return self.stats
+
+
+async def crawl_programs(keyword, prevent, fetch=http_fetch, search_url=MYTCAS_SEARCH_URL, **engine_options):
+    """Crawl one keyword search and all its program detail pages.
+
+    Returns a list of dicts with the columns main.py writes ('University', 'Program', 'Link',
+    'ค่าใช้จ่าย', 'Course Name', 'Course Type') plus the engine stats.
+    """
+    from cost_scraper import parse_program_details, parse_search_results
+
+    records = []
+
+    async def on_page(job, html):
+        if job.kind == "search":
+            kept, _ = parse_search_results(html, prevent, base_url=job.url)
+            for item in kept:
+                engine.submit(CrawlJob("detail", item["Link"], meta=item))
+        else:
+            records.append({**job.meta, **parse_program_details(html)})
+
+    engine = CrawlEngine(on_page, fetch=fetch, **engine_options)
+    stats = await engine.run([CrawlJob("search", search_url.format(query=quote(keyword)))])
+    return records, stats
+
+
+# Try the engine against the local mock server: python crawl_engine.py --mock --error-rate 0.3
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crawl mytcas.com search + detail pages with asyncio.")
+    parser.add_argument("--keyword", default="วิศวกรรมศาสตร์ วิศวกรรมคอมพิวเตอร์")
+    parser.add_argument("--prevent", default="คอมพิวเตอร์")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=1.0, help="requests per second per host")
+    parser.add_argument("--mock", action="store_true", help="crawl a local mock server instead of mytcas.com")
+    parser.add_argument("--latency", type=float, default=0.2, help="mock server latency (seconds)")
+    parser.add_argument("--error-rate", type=float, default=0.1, help="mock server error rate")
+    args = parser.parse_args()
+
+    url_template = MYTCAS_SEARCH_URL
+    server = None
+    if args.mock:
+        from mock_tcas_server import start_mock_server
+        server = start_mock_server(latency=args.latency, error_rate=args.error_rate)
+        url_template = f"http://127.0.0.1:{server.server_port}/search?q={{query}}"
+
+    crawl_tracer = CrawlTracer("crawl_engine")
+    try:
+        rows, crawl_stats = asyncio.run(crawl_programs(
+            args.keyword, args.prevent, search_url=url_template,
+            concurrency=args.concurrency, rate_per_host=args.rate, burst=args.concurrency,
+            backoff_base=0.2 if args.mock else 1.0, timeout=args.latency * 10 if args.mock else 30,
+            tracer=crawl_tracer,
+        ))
+        print(f"✅ ดึงข้อมูล {len(rows)} หลักสูตร: {crawl_stats} (trace run {crawl_tracer.run_id})")
+    finally:
+        if server is not None:
+            server.shutdown()
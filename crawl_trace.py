@@ -0,0 +1,129 @@
+import contextvars
+import glob
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from logging.handlers import RotatingFileHandler
+
+import pandas as pd
+
+# JSON-lines trace of every crawled URL, rotated at TRACE_MAX_BYTES with TRACE_BACKUPS old files kept
+TRACE_PATH = os.path.join('data', 'crawl_trace.jsonl')
+TRACE_MAX_BYTES = 5 * 2 ** 20
+TRACE_BACKUPS = 3
+# Millisecond timings in a trace record, in pipeline order
+TIMING_FIELDS = ('queue_ms', 'throttle_ms', 'fetch_ms', 'dom_ms', 'parse_ms')
+# Outcomes that count as a failed URL on the health page
+FAILED_OUTCOMES = ('failed', 'error')
+PERCENTILES = (0.5, 0.9, 0.99)
+TRACE_COLUMNS = ('run', 'src', 'ts', 'url', 'kind', 'outcome', 'status', 'retries', 'bytes', *TIMING_FIELDS, 'error')
+
+# Trace fields of the URL being fetched; fetch functions add to it with note() (e.g. DOM-ready time)
+current_trace = contextvars.ContextVar('current_trace', default=None)
+
+
+def note(**fields):
+    """Add fields to the trace record of the URL currently being fetched (no-op outside a traced fetch)."""
+    trace = current_trace.get()
+    if trace is not None:
+        trace.update(fields)
+
+
+def elapsed_ms(started):
+    return round((time.perf_counter() - started) * 1000, 1)
+
+
+_handlers = {}
+_handlers_lock = threading.Lock()
+
+
+def _shared_handler(path, max_bytes, backups):
+    # One handler per file, so several tracers in a process rotate the same file safely
+    path = os.path.abspath(path)
+    with _handlers_lock:
+        if path not in _handlers:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding='utf-8')
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            _handlers[path] = handler
+        return _handlers[path]
+
+
+class CrawlTracer:
+    """
+    Writes one compact JSON line per crawled URL to a rotating log.
+
+    Every record carries the run id, the source script, a timestamp and whatever timing fields
+    the caller measured (see TIMING_FIELDS) plus 'bytes', 'retries' and 'outcome'.
+    """
+
+    def __init__(self, source, run_id=None, path=TRACE_PATH, max_bytes=TRACE_MAX_BYTES, backups=TRACE_BACKUPS):
+        self.source = source
+        self.run_id = run_id or f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        self._handler = _shared_handler(path, max_bytes, backups)
+
+    def record(self, url, kind, outcome, **fields):
+        """Append one URL's trace; None-valued fields are left out."""
+        entry = {'run': self.run_id, 'src': self.source, 'ts': round(time.time(), 3),
+                 'url': url, 'kind': kind, 'outcome': outcome}
+        entry.update((key, value) for key, value in fields.items() if value is not None)
+        line = json.dumps(entry, ensure_ascii=False, separators=(',', ':'))
+        self._handler.handle(logging.makeLogRecord({'msg': line, 'levelno': logging.INFO, 'levelname': 'INFO'}))
+
+
+def read_traces(path=TRACE_PATH):
+    """Every record of the trace log and its rotated backups as one DataFrame (oldest first)."""
+    backups = [name for name in glob.glob(f"{glob.escape(path)}.*") if name.rsplit('.', 1)[-1].isdigit()]
+    files = sorted(backups, key=lambda name: int(name.rsplit('.', 1)[-1]), reverse=True)
+    if os.path.exists(path):
+        files.append(path)
+    rows = []
+    for name in files:
+        with open(name, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    rows.append(json.loads(line))
+                except ValueError:
+                    continue  # A line cut short by a crash or rotation
+    df = pd.DataFrame(rows)
+    return df.reindex(columns=[*TRACE_COLUMNS, *(column for column in df.columns if column not in TRACE_COLUMNS)])
+
+
+def run_health(traces):
+    """One row per run: pages, failure rate, retries, bytes and duration, newest run first."""
+    if traces.empty:
+        return pd.DataFrame(columns=['run', 'source', 'started', 'pages', 'failed', 'failure_rate', 'retries',
+                                     'megabytes', 'duration_s', 'fetch_p50_ms', 'fetch_p90_ms'])
+    traces = traces.assign(failed=traces['outcome'].isin(FAILED_OUTCOMES))
+    grouped = traces.groupby('run', sort=False)
+    health = pd.DataFrame({
+        'source': grouped['src'].first(),
+        'started': pd.to_datetime(grouped['ts'].min(), unit='s'),
+        'pages': grouped.size(),
+        'failed': grouped['failed'].sum(),
+        'retries': grouped['retries'].sum(min_count=1).fillna(0).astype(int),
+        'megabytes': (grouped['bytes'].sum() / 2 ** 20).round(2),
+        'duration_s': (grouped['ts'].max() - grouped['ts'].min()).round(1),
+        'fetch_p50_ms': grouped['fetch_ms'].quantile(0.5).round(1),
+        'fetch_p90_ms': grouped['fetch_ms'].quantile(0.9).round(1),
+    })
+    health['failure_rate'] = (health['failed'] / health['pages']).round(3)
+    health = health.reset_index().sort_values('started', ascending=False)
+    return health[['run', 'source', 'started', 'pages', 'failed', 'failure_rate', 'retries',
+                   'megabytes', 'duration_s', 'fetch_p50_ms', 'fetch_p90_ms']]
+
+
+def latency_percentiles(traces, run_id):
+    """p50/p90/p99 of every timing field for one run, long format (phase, percentile, ms)."""
+    run = traces[traces['run'] == run_id]
+    columns = [field for field in TIMING_FIELDS if run[field].notna().any()]
+    if run.empty or not columns:
+        return pd.DataFrame(columns=['phase', 'percentile', 'ms'])
+    quantiles = run[columns].quantile(list(PERCENTILES))
+    quantiles.index = [f"p{round(q * 100)}" for q in PERCENTILES]
+    long = quantiles.rename_axis('percentile').reset_index().melt(id_vars='percentile', var_name='phase', value_name='ms')
+    long['phase'] = long['phase'].str.replace('_ms', '', regex=False)
+    return long
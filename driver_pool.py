@@ -0,0 +1,338 @@
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import threading
+import time
+from contextlib import contextmanager
+
+from crawl_trace import note
+from selenium import webdriver
+from selenium.common.exceptions import SessionNotCreatedException, WebDriverException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+
+# Where the resolved chromedriver path is remembered, so later runs start without network access
+DRIVER_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".tcas-dashboard", "chromedriver.json")
+# Restart a browser after this many page loads to cap Chrome's memory growth
+DEFAULT_MAX_PAGES = 50
+# Seconds to let JavaScript render a page before reading page_source (as cost_scraper.py did)
+DEFAULT_RENDER_WAIT = 3
+# Set to 1 to use the resource-blocking profile. Off by default until benchmark_profiles results on
+# saved mytcas.com pages show it is faster and every cost field still parses.
+LIGHTWEIGHT_ENV = "TCAS_LIGHTWEIGHT_BROWSER"
+
+# Requests the lightweight profile blocks: we only read text from dt/dd and the result list
+BLOCKED_URL_PATTERNS = [
+    # Images
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico", "*.bmp", "*.avif",
+    # Media
+    "*.mp4", "*.webm", "*.mp3", "*.ogg", "*.wav", "*.m3u8",
+    # Fonts
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    # Analytics, ads and social widgets
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*googlesyndication.com*",
+    "*facebook.net*", "*facebook.com/tr*", "*hotjar.com*", "*clarity.ms*", "*tiktok.com*",
+]
+
+
+def resolve_driver_path(cache_path=DRIVER_CACHE_PATH, refresh=False):
+    """
+    Returns the chromedriver binary path, resolving it with ChromeDriverManager only once.
+
+    CHROMEDRIVER_PATH overrides everything. Otherwise a cached path is used while the file still
+    exists, so startup works offline; the cache is refreshed after a successful install.
+    With `refresh` the cached path is ignored and resolved again (e.g. after a Chrome update
+    made the cached chromedriver the wrong version).
+    """
+    override = os.environ.get("CHROMEDRIVER_PATH")
+    if override:
+        return override
+
+    cached = None
+    if not refresh and os.path.exists(cache_path):
+        with open(cache_path, encoding="utf-8") as f:
+            cached = json.load(f).get("path")
+        if cached and os.path.exists(cached):
+            return cached
+
+    from webdriver_manager.chrome import ChromeDriverManager  # Only needed when the cache misses
+    path = ChromeDriverManager().install()
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    with open(cache_path, "w", encoding="utf-8") as f:
+        json.dump({"path": path, "resolved_at": time.strftime("%Y-%m-%dT%H:%M:%S")}, f)
+    return path
+
+
+def lightweight_default():
+    """Whether runs use the resource-blocking profile unless told otherwise (opt-in via TCAS_LIGHTWEIGHT_BROWSER=1)."""
+    return os.environ.get(LIGHTWEIGHT_ENV, "0").strip().lower() in ("1", "true", "yes", "on")
+
+
+def build_chrome_options(lightweight=False):
+    """Headless Chrome options used by both main.py and cost_scraper.py.
+
+    The lightweight profile also disables images and media autoplay at the browser level;
+    fonts and analytics hosts are blocked per request once the browser is up (see block_resources).
+    """
+    options = Options()
+    options.add_argument("--headless")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    if lightweight:
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_argument("--autoplay-policy=user-gesture-required")
+        options.add_argument("--disable-extensions")
+        options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+    return options
+
+
+def block_resources(driver, patterns=BLOCKED_URL_PATTERNS):
+    """Intercept requests via the DevTools protocol and refuse any URL matching `patterns`."""
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(patterns)})
+
+
+def dom_ready_ms(driver):
+    """Navigation start to DOMContentLoaded of the current page, or None if the browser can't tell."""
+    try:
+        value = driver.execute_script(
+            "const t = performance.timing; return t.domContentLoadedEventEnd - t.navigationStart;")
+    except Exception:
+        return None
+    return value if isinstance(value, (int, float)) and value >= 0 else None
+
+
+class BrowserSession:
+    """One pooled Chrome. Load pages through get() so the pool can count them and recycle the browser."""
+
+    def __init__(self, pool):
+        self._pool = pool
+        self.driver = None
+        self.pages = 0
+        self.launched = 0
+
+    def _start_chrome(self, driver_path):
+        options = self._pool.options_factory(lightweight=self._pool.lightweight)
+        return webdriver.Chrome(service=Service(driver_path), options=options)
+
+    def _launch(self):
+        try:
+            self.driver = self._start_chrome(self._pool.driver_path())
+        except SessionNotCreatedException:
+            # Usually Chrome updated past the cached chromedriver's version: resolve it again, retry once
+            print("⚠️ Chrome did not start with the cached chromedriver, resolving it again")
+            self.driver = self._start_chrome(self._pool.driver_path(refresh=True))
+        if self._pool.lightweight:
+            block_resources(self.driver)
+        self.pages = 0
+        self.launched += 1
+
+    def recycle(self):
+        """Quit the current browser; the next get() starts a fresh one."""
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except WebDriverException:
+                pass  # The browser already died; there is nothing left to quit
+            finally:
+                self.driver = None
+
+    def get(self, url):
+        """Load a URL, starting or recycling the browser first when needed."""
+        if self.driver is not None and self.pages >= self._pool.max_pages:
+            print(f"♻️ Recycling browser after {self.pages} pages")
+            self.recycle()
+        if self.driver is None:
+            self._launch()
+        self.pages += 1
+        self.driver.get(url)
+        return self.driver
+
+
+class DriverPool:
+    """
+    Thread-safe pool of up to `size` headless Chrome sessions.
+
+    Browsers start on first use and are reused across the search and detail phases; each one is
+    restarted after `max_pages` page loads. `lightweight` selects the resource-blocking profile
+    (defaults to the TCAS_LIGHTWEIGHT_BROWSER setting).
+    """
+
+    def __init__(self, size=1, max_pages=DEFAULT_MAX_PAGES, lightweight=None, options_factory=build_chrome_options):
+        self.size = size
+        self.max_pages = max_pages
+        self.lightweight = lightweight_default() if lightweight is None else lightweight
+        self.options_factory = options_factory
+        self._driver_path = None
+        self._idle = []
+        self._created = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def driver_path(self, refresh=False):
+        if self._driver_path is None or refresh:
+            self._driver_path = resolve_driver_path(refresh=refresh)
+        return self._driver_path
+
+    @contextmanager
+    def session(self):
+        """Borrow a BrowserSession, waiting while all `size` sessions are in use."""
+        with self._cond:
+            while not self._closed and not self._idle and self._created >= self.size:
+                self._cond.wait()
+            if self._closed:
+                raise RuntimeError("DriverPool is closed")
+            if self._idle:
+                session = self._idle.pop()
+            else:
+                session = BrowserSession(self)
+                self._created += 1
+        try:
+            yield session
+        except WebDriverException:
+            # A crashed or disconnected browser must not be handed to the next borrower
+            session.recycle()
+            raise
+        finally:
+            with self._cond:
+                closed = self._closed
+                if not closed:
+                    self._idle.append(session)
+                    self._cond.notify()
+            if closed:
+                session.recycle()  # Returned after close(): nothing will reuse or quit it later
+
+    def close(self):
+        """Quit every idle browser; sessions still borrowed are quit when they are returned."""
+        with self._cond:
+            self._closed = True
+            sessions, self._idle = self._idle, []
+            self._cond.notify_all()
+        for session in sessions:
+            session.recycle()
+        print("WebDriver pool closed.")
+
+
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+
+def shared_pool():
+    """Process-wide pool used by main.py and cost_scraper.py unless they are given one."""
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None or _shared_pool._closed:
+            _shared_pool = DriverPool()
+        return _shared_pool
+
+
+def browser_fetch(pool, render_wait=DEFAULT_RENDER_WAIT):
+    """Async fetch function for CrawlEngine that renders pages in pooled browsers."""
+
+    def _load(url):
+        with pool.session() as session:
+            driver = session.get(url)
+            note(dom_ms=dom_ready_ms(driver))
+            time.sleep(render_wait)  # Let JavaScript render
+            return driver.page_source
+
+    async def fetch(url):
+        return await asyncio.to_thread(_load, url)
+
+    return fetch
+
+
+def _browser_rss_mb(driver):
+    """Resident memory of chromedriver and every Chrome process under it (needs psutil)."""
+    try:
+        import psutil
+    except ImportError:
+        return None
+    try:
+        root = psutil.Process(driver.service.process.pid)
+        processes = [root, *root.children(recursive=True)]
+        return sum(p.memory_info().rss for p in processes if p.is_running()) / 2 ** 20
+    except (psutil.Error, AttributeError):
+        return None
+
+
+def benchmark_profiles(urls, runs=3, render_wait=0):
+    """Load every URL `runs` times with the default and the lightweight profile.
+
+    Returns one dict per profile with the median load time per page (navigation start to
+    load event), total bytes transferred, peak browser RSS and how many page loads still had
+    a cost field after parsing (the profile must not lose data to be worth enabling).
+    """
+    from cost_scraper import parse_program_details
+
+    results = []
+    for lightweight in (False, True):
+        pool = DriverPool(size=1, lightweight=lightweight)
+        load_ms, transfer_kb, rss, cost_parsed = [], [], [], 0
+        try:
+            with pool.session() as session:
+                for _ in range(runs):
+                    for url in urls:
+                        driver = session.get(url)
+                        time.sleep(render_wait)
+                        load_ms.append(driver.execute_script(
+                            "const t = performance.timing; return t.loadEventEnd - t.navigationStart;"))
+                        transfer_kb.append(driver.execute_script(
+                            "return performance.getEntriesByType('resource').reduce((s, r) => s + r.transferSize, 0)"
+                            " + performance.getEntriesByType('navigation')[0].transferSize;") / 1024)
+                        rss.append(_browser_rss_mb(driver))
+                        cost_parsed += parse_program_details(driver.page_source)["ค่าใช้จ่าย"] is not None
+        finally:
+            pool.close()
+        peak_rss = max((r for r in rss if r is not None), default=None)
+        results.append({
+            "profile": "lightweight" if lightweight else "default",
+            "pages": len(load_ms),
+            "median_load_ms": round(statistics.median(load_ms), 1),
+            "median_transfer_kb": round(statistics.median(transfer_kb), 1),
+            "peak_rss_mb": round(peak_rss, 1) if peak_rss is not None else "n/a (install psutil)",
+            "cost_parsed": f"{cost_parsed}/{len(load_ms)}",
+        })
+    return results
+
+
+def _serve_fixtures(directory):
+    """Serve saved pages from `directory` on a local port; returns (server, [page URLs])."""
+    from functools import partial
+    from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+    class QuietHandler(SimpleHTTPRequestHandler):
+        def log_message(self, *args):
+            pass  # Keep access-log lines out of the benchmark output
+
+    handler = partial(QuietHandler, directory=directory)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    pages = sorted(name for name in os.listdir(directory) if name.endswith((".html", ".htm")))
+    return server, [f"http://127.0.0.1:{server.server_port}/{name}" for name in pages]
+
+
+# Compare browser profiles: python driver_pool.py --fixtures saved_pages/ (or pass URLs)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the default vs lightweight scraping browser profile.")
+    parser.add_argument("urls", nargs="*", help="pages to load (e.g. mytcas.com program pages)")
+    parser.add_argument("--fixtures", help="directory of saved .html pages to serve locally")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    fixture_server = None
+    bench_urls = list(args.urls)
+    if args.fixtures:
+        fixture_server, fixture_urls = _serve_fixtures(args.fixtures)
+        bench_urls += fixture_urls
+    if not bench_urls:
+        raise SystemExit("Give at least one URL or --fixtures DIR")
+    try:
+        for row in benchmark_profiles(bench_urls, runs=args.runs):
+            print(row)
+    finally:
+        if fixture_server is not None:
+            fixture_server.shutdown()
@@ -0,0 +1,94 @@
+import os
+import tempfile
+
+import pandas as pd
+
+# Columns written to exported files (when the dataset has them), with their exported header
+EXPORT_COLUMNS = {
+    'University': 'University',
+    'Program': 'Program',
+    'Course Name': 'Course Name',
+    'Course Type': 'Course Type',
+    'Total program cost (num)': 'Total program cost (Baht)',
+    'term': 'Cost per term (Baht)',
+    'Link': 'Link',
+}
+# Passed as mimetype=; Flask adds '; charset=utf-8' to text/* types itself
+EXPORT_MIMETYPES = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+# Rows converted per chunk, so an export never holds more than this many rows as text
+CHUNK_ROWS = 1000
+# Bytes read per chunk when streaming a finished XLSX file
+FILE_CHUNK_BYTES = 64 * 1024
+
+
+def xlsx_available():
+    """XLSX export needs openpyxl (in requirements.txt); a trimmed install gets a 501 instead of a crash."""
+    try:
+        import openpyxl  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def export_columns(df):
+    return [column for column in EXPORT_COLUMNS if column in df.columns]
+
+
+def iter_row_chunks(df, positions, chunk_rows=CHUNK_ROWS):
+    """Yield the export columns of df.iloc[positions] in chunks of `chunk_rows` rows."""
+    columns = [df.columns.get_loc(column) for column in export_columns(df)]
+    for start in range(0, len(positions), chunk_rows):
+        yield df.iloc[positions[start:start + chunk_rows], columns]
+
+
+def stream_csv(df, positions, chunk_rows=CHUNK_ROWS):
+    """Yield a UTF-8 CSV (with BOM, so Excel shows Thai correctly) of df.iloc[positions], chunk by chunk."""
+    header = [EXPORT_COLUMNS[column] for column in export_columns(df)]
+    yield '\ufeff' + pd.DataFrame(columns=header).to_csv(index=False)
+    for chunk in iter_row_chunks(df, positions, chunk_rows):
+        yield chunk.to_csv(index=False, header=False)
+
+
+def _cell(value):
+    # openpyxl wants plain Python values; NaN becomes an empty cell
+    if pd.isna(value):
+        return None
+    return value.item() if hasattr(value, 'item') else value
+
+
+def stream_xlsx(df, positions, chunk_rows=CHUNK_ROWS):
+    """
+    Yield an XLSX workbook of df.iloc[positions].
+
+    Rows are written with openpyxl's write-only mode into a temporary file (an XLSX is a zip,
+    so its bytes are only final once every row is written) and the file is then streamed
+    in FILE_CHUNK_BYTES pieces and deleted.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Programs')
+    sheet.append([EXPORT_COLUMNS[column] for column in export_columns(df)])
+    for chunk in iter_row_chunks(df, positions, chunk_rows):
+        for row in chunk.itertuples(index=False, name=None):
+            sheet.append([_cell(value) for value in row])
+
+    fd, path = tempfile.mkstemp(suffix='.xlsx')
+    os.close(fd)
+    try:
+        workbook.save(path)
+        with open(path, 'rb') as f:
+            while block := f.read(FILE_CHUNK_BYTES):
+                yield block
+    finally:
+        os.remove(path)
+
+
+def stream_export(df, positions, fmt, chunk_rows=CHUNK_ROWS):
+    """Generator of the exported file in `fmt` ('csv' or 'xlsx')."""
+    if fmt == 'xlsx':
+        return stream_xlsx(df, positions, chunk_rows)
+    return stream_csv(df, positions, chunk_rows)
@@ -0,0 +1,153 @@
+import os
+import sqlite3
+import sys
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+from cleaning import extract_max_cost, term_and_total
+
+# Append-only store of every crawl; one snapshot per run of main.py
+HISTORY_DB_PATH = os.path.join('data', 'history.sqlite')
+# Summary row key that aggregates all universities of a snapshot
+ALL_UNIVERSITIES = '*'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    dataset     TEXT NOT NULL,
+    crawl_date  TEXT NOT NULL,
+    row_count   INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS program_costs (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots(id),
+    link        TEXT NOT NULL,
+    crawl_date  TEXT NOT NULL,
+    university  TEXT,
+    program     TEXT,
+    course_name TEXT,
+    cost_text   TEXT,
+    term_cost   REAL,
+    total_cost  REAL
+);
+CREATE INDEX IF NOT EXISTS idx_program_costs_link_date ON program_costs (link, crawl_date);
+CREATE INDEX IF NOT EXISTS idx_program_costs_university_date ON program_costs (university, crawl_date);
+CREATE TABLE IF NOT EXISTS snapshot_summary (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots(id),
+    dataset     TEXT NOT NULL,
+    crawl_date  TEXT NOT NULL,
+    university  TEXT NOT NULL,
+    programs    INTEGER NOT NULL,
+    avg_cost    REAL,
+    min_cost    REAL,
+    max_cost    REAL,
+    PRIMARY KEY (snapshot_id, university)
+);
+CREATE INDEX IF NOT EXISTS idx_snapshot_summary_dataset ON snapshot_summary (dataset, university, crawl_date);
+"""
+
+
+def connect(db_path=HISTORY_DB_PATH):
+    """Open the history database, creating the schema on first use."""
+    os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+@contextmanager
+def _transaction(db_path):
+    """Connection that commits on success and is always closed."""
+    conn = connect(db_path)
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def record_snapshot(raw_df, dataset, crawl_date=None, db_path=HISTORY_DB_PATH):
+    """Append one crawl (a raw_{prefix}.csv shaped frame) and its per-university summaries.
+
+    Returns the new snapshot id.
+    """
+    crawl_date = crawl_date or datetime.now().isoformat(timespec='seconds')
+    df = raw_df.copy()
+    max_costs = df['Cost'].apply(extract_max_cost)
+    split = [term_and_total(text, cost) for text, cost in zip(df['Cost'], max_costs)]
+    df['term_cost'] = [term for term, _ in split]
+    df['total_cost'] = [total for _, total in split]
+
+    # Pre-aggregate once per snapshot so the dashboard never reads raw history
+    costs = df['total_cost'].astype(float)
+    summary = costs.groupby(df['University'].astype(str)).agg(['size', 'mean', 'min', 'max'])
+    summary.loc[ALL_UNIVERSITIES] = [len(costs), costs.mean(), costs.min(), costs.max()]
+
+    def _value(v):
+        return None if pd.isna(v) else v
+
+    with _transaction(db_path) as conn:
+        cur = conn.execute(
+            "INSERT INTO snapshots (dataset, crawl_date, row_count) VALUES (?, ?, ?)",
+            (dataset, crawl_date, len(df)),
+        )
+        snapshot_id = cur.lastrowid
+        conn.executemany(
+            "INSERT INTO program_costs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (snapshot_id, row['Link'], crawl_date, _value(row.get('University')), _value(row.get('Program')),
+                 _value(row.get('Course Name')), _value(row['Cost']), _value(row['term_cost']), _value(row['total_cost']))
+                for _, row in df.iterrows()
+            ],
+        )
+        conn.executemany(
+            "INSERT INTO snapshot_summary VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (snapshot_id, dataset, crawl_date, university, int(stats['size']),
+                 _value(stats['mean']), _value(stats['min']), _value(stats['max']))
+                for university, stats in summary.iterrows()
+            ],
+        )
+    return snapshot_id
+
+
+def program_cost_history(link, db_path=HISTORY_DB_PATH):
+    """Cost of one program (by Link) across all crawls, oldest first."""
+    with _transaction(db_path) as conn:
+        return pd.read_sql_query(
+            "SELECT crawl_date, cost_text, term_cost, total_cost FROM program_costs "
+            "WHERE link = ? ORDER BY crawl_date",
+            conn, params=(link,),
+        )
+
+
+def university_cost_history(university, db_path=HISTORY_DB_PATH):
+    """Every program cost of one university across all crawls, oldest first."""
+    with _transaction(db_path) as conn:
+        return pd.read_sql_query(
+            "SELECT crawl_date, link, course_name, term_cost, total_cost FROM program_costs "
+            "WHERE university = ? ORDER BY crawl_date, link",
+            conn, params=(university,),
+        )
+
+
+def summary_history(dataset, universities=None, db_path=HISTORY_DB_PATH):
+    """Pre-aggregated per-snapshot cost summaries; all universities combined when none are given."""
+    universities = list(universities) if universities else [ALL_UNIVERSITIES]
+    placeholders = ', '.join('?' * len(universities))
+    with _transaction(db_path) as conn:
+        return pd.read_sql_query(
+            "SELECT crawl_date, university, programs, avg_cost, min_cost, max_cost FROM snapshot_summary "
+            f"WHERE dataset = ? AND university IN ({placeholders}) ORDER BY crawl_date",
+            conn, params=(dataset, *universities),
+        )
+
+
+# Backfill an existing raw CSV: python history_store.py data/coe/raw_coe.csv coe [2025-05-01]
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        raise SystemExit("Usage: python history_store.py <raw_csv> <dataset> [crawl_date]")
+    raw_path, dataset_name = sys.argv[1], sys.argv[2]
+    snapshot = record_snapshot(pd.read_csv(raw_path), dataset_name, sys.argv[3] if len(sys.argv) > 3 else None)
+    print(f"✅ Recorded snapshot {snapshot} for '{dataset_name}' from '{raw_path}'")
@@ -1,20 +1,23 @@
 import pandas as pd
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
 import time
+from contextlib import ExitStack
 import xml.etree.ElementTree as ET
 from xml.dom import minidom
 import csv
 import os
 
 # Import the function from another file
-from cost_scraper import scrape_costs_from_dataframe # This function now returns 'Course Name' and 'Course Type'
+from cost_scraper import scrape_costs_from_dataframe, DETAIL_COLUMNS # This function now returns 'Course Name', 'Course Type', ...
+from history_store import record_snapshot
+from driver_pool import dom_ready_ms, shared_pool
+from crawl_trace import CrawlTracer, elapsed_ms
+
+# คอลัมน์เพิ่มเติมจากหน้ารายละเอียดที่บันทึกต่อท้าย raw CSV
+EXTRA_RAW_COLUMNS = [column for column in DETAIL_COLUMNS if column not in ("ค่าใช้จ่าย", "Course Name", "Course Type")]
 
 # Get user input for search option
 print("เลือกตัวเลือกการค้นหา:")
@@ -46,18 +49,20 @@ else:
 directory_path = f"data/{folder_name}"
 os.makedirs(directory_path, exist_ok=True)
 
-# ตั้งค่า browser
-options = Options()
-options.add_argument("--headless")
-options.add_argument('--no-sandbox')
-options.add_argument('--disable-dev-shm-usage')
-
-driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+# ตั้งค่า browser: ใช้ pool ร่วมกับ cost_scraper.py (เปิด Chrome ครั้งเดียวทั้งหน้าค้นหาและหน้ารายละเอียด)
+pool = shared_pool()
+browser = ExitStack()
+session = browser.enter_context(pool.session())
+# บันทึกเวลาของแต่ละ URL ลง data/crawl_trace.jsonl (ดูได้ที่หน้า /crawl-health)
+tracer = CrawlTracer("main")
 
 try:
     print("กำลังเปิดเว็บไซต์...")
     # แก้ไข URL (ลบช่องว่าง)
-    driver.get("https://www.mytcas.com/")
+    page_started = time.perf_counter()
+    driver = session.get("https://www.mytcas.com/")
+    home_fetch_ms = elapsed_ms(page_started)
+    tracer.record("https://www.mytcas.com/", "home", "ok", fetch_ms=home_fetch_ms, dom_ms=dom_ready_ms(driver), retries=0)
     
     # รอให้หน้าเว็บโหลดเสร็จแบบเต็ม
     time.sleep(7)
@@ -72,6 +77,7 @@ try:
     search_input.send_keys(keyword)
     
     print("กำลังกด Enter...")
+    search_started = time.perf_counter()
     search_input.send_keys(Keys.ENTER)
 
     # รอให้ URL เปลี่ยน และ AJAX โหลดเสร็จ
@@ -83,6 +89,9 @@ try:
     ul = result_container.find_element(By.CSS_SELECTOR, "ul.t-programs")
     li_elements = ul.find_elements(By.TAG_NAME, "li")
     print(f"พบ {len(li_elements)} รายการ")
+    # fetch_ms ของหน้าค้นหารวมเวลารอ 10 วินาทีด้านบน
+    tracer.record(driver.current_url, "search", "ok", fetch_ms=elapsed_ms(search_started), retries=0,
+                  bytes=len(driver.page_source.encode("utf-8")))
 
     result = []
     skipped_items = []  # เก็บรายการที่ถูกข้าม
@@ -164,7 +173,7 @@ try:
         print("\nกำลังดึงข้อมูลค่าใช้จ่าย, ชื่อหลักสูตร และ ประเภทหลักสูตร...")
         # ใช้ฟังก์ชัน scrape_costs_from_dataframe จากไฟล์อื่นเพื่อดึงข้อมูลค่าใช้จ่าย และข้อมูลใหม่
         # ฟังก์ชันนี้คืนค่า DataFrame ที่มีคอลัมน์เพิ่มเติม: 'ค่าใช้จ่าย', 'Course Name', 'Course Type'
-        df_with_extra_info = scrape_costs_from_dataframe(df_initial)
+        df_with_extra_info = scrape_costs_from_dataframe(df_initial, session=session, tracer=tracer)
         print("✅ ดึงข้อมูลเสร็จสิ้น")
 
         # --- การกรองขั้นสุดท้ายตาม 'Course Name' ---
@@ -192,9 +201,8 @@ try:
     else:
         print("ไม่พบข้อมูลที่จะดึงข้อมูลเพิ่มเติม")
         # ถ้า df ว่าง ให้สร้างคอลัมน์ใหม่ด้วยตนเองเพื่อป้องกัน KeyError ภายหลัง
-        df_initial["ค่าใช้จ่าย"] = ""
-        df_initial["Course Name"] = ""
-        df_initial["Course Type"] = ""
+        for column in DETAIL_COLUMNS:
+            df_initial[column] = None
         df_final = df_initial # ใช้ df_final สำหรับบันทึก
 
 
@@ -205,7 +213,7 @@ try:
         writer = csv.writer(f)
         
         # เขียนหัวตารางด้วยภาษาอังกฤษ - เพิ่ม Course Name และ Course Type
-        writer.writerow(["No", "University", "Program", "Course Name", "Course Type", "Link", "Cost"]) # Updated header row
+        writer.writerow(["No", "University", "Program", "Course Name", "Course Type", "Link", "Cost", *EXTRA_RAW_COLUMNS]) # Updated header row
         
         # เขียนข้อมูลแต่ละแถว - เพิ่มข้อมูล Course Name และ Course Type
         # ใช้ df_final แทน df_with_extra_info
@@ -217,14 +225,20 @@ try:
                 row.get("Course Name", ""),   # ดึงข้อมูล Course Name
                 row.get("Course Type", ""),   # ดึงข้อมูล Course Type
                 row["Link"],
-                row.get("ค่าใช้จ่าย", "")      # ใช้ get() เพื่อป้องกัน KeyError
+                row.get("ค่าใช้จ่าย", ""),     # ใช้ get() เพื่อป้องกัน KeyError
+                *["" if pd.isna(row.get(column)) else row.get(column) for column in EXTRA_RAW_COLUMNS]  # null เขียนเป็นช่องว่าง
             ])
     
     print(f"✅ บันทึกไฟล์ '{filename}' เสร็จสิ้น")
 
+    # เก็บ snapshot ลงฐานข้อมูลประวัติ (append-only) เพื่อดูการเปลี่ยนแปลงค่าใช้จ่ายระหว่างรอบ
+    snapshot_id = record_snapshot(pd.read_csv(filename), file_prefix)
+    print(f"✅ บันทึก snapshot #{snapshot_id} ลงประวัติการ scrape เสร็จสิ้น")
+
 except Exception as e:
     print("เกิดข้อผิดพลาดหลัก:", str(e))
 
 finally:
-    driver.quit()
-    print("จบการทำงาน")
\ No newline at end of file
+    browser.close()  # คืน session ให้ pool
+    pool.close()
+    print(f"จบการทำงาน (trace run: {tracer.run_id})")
\ No newline at end of file
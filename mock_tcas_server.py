@@ -0,0 +1,97 @@
+import argparse
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Fake universities and programs shaped like mytcas.com search results / detail pages
+MOCK_UNIVERSITIES = [
+    "จุฬาลงกรณ์มหาวิทยาลัย",
+    "มหาวิทยาลัยเกษตรศาสตร์",
+    "มหาวิทยาลัยเชียงใหม่",
+    "มหาวิทยาลัยขอนแก่น",
+    "สถาบันเทคโนโลยีพระจอมเกล้าเจ้าคุณทหารลาดกระบัง",
+]
+MOCK_PROGRAMS = 40
+
+
+def _search_page(query):
+    items = []
+    for i in range(MOCK_PROGRAMS):
+        name = "วิศวกรรมคอมพิวเตอร์" if i % 4 else "วิศวกรรมโยธา"
+        university = MOCK_UNIVERSITIES[i % len(MOCK_UNIVERSITIES)]
+        items.append(
+            f'<li><a href="/programs/{i}"><h3><strong>{name}</strong> {query}</h3>'
+            f'<span>คณะวิศวกรรมศาสตร์</span><span>{university}</span></a></li>'
+        )
+    return f'<html><body><div id="results" class="t-result"><ul class="t-programs">{"".join(items)}</ul></div></body></html>'
+
+
+def _detail_page(program_id):
+    cost = 20000 + 1500 * program_id
+    return (
+        "<html><body><dl>"
+        f"<dt>ชื่อหลักสูตร</dt><dd>หลักสูตรวิศวกรรมศาสตรบัณฑิต สาขาวิชาวิศวกรรมคอมพิวเตอร์ {program_id}</dd>"
+        "<dt>ประเภทหลักสูตร</dt><dd>ภาษาไทย ปกติ</dd>"
+        "<dt>วิทยาเขต</dt><dd>วิทยาเขตหลัก</dd>"
+        + (f"<dt>ค่าใช้จ่าย</dt><dd>{cost:,} บาท/เทอม</dd>" if program_id % 7 else "")
+        + f"<dt>รอบ 1 Portfolio</dt><dd>รับ {program_id % 5 + 10} คน</dd>"
+        "<dt>รอบ 3 Admission</dt><dd>รับ 40 คน</dd>"
+        "</dl></body></html>"
+    )
+
+
+def make_handler(latency, error_rate):
+    """Request handler that sleeps `latency` ± 50% and fails `error_rate` of requests (503 or timeout)."""
+
+    class MockTcasHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            time.sleep(latency * random.uniform(0.5, 1.5))
+            if random.random() < error_rate:
+                if random.random() < 0.5:
+                    self.send_error(503, "Injected error")
+                else:
+                    time.sleep(latency * 20)  # Injected slow response; clients with short timeouts give up
+                    self.send_error(504, "Injected timeout")
+                return
+            url = urlparse(self.path)
+            if url.path == "/search":
+                body = _search_page(parse_qs(url.query).get("q", [""])[0])
+            elif url.path.startswith("/programs/"):
+                body = _detail_page(int(url.path.rsplit("/", 1)[-1]))
+            else:
+                self.send_error(404)
+                return
+            data = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    return MockTcasHandler
+
+
+def start_mock_server(port=0, latency=0.2, error_rate=0.1):
+    """Start the mock server in a background thread; call .shutdown() on the result to stop it."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(latency, error_rate))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local mock of mytcas.com with injected latency and errors.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--error-rate", type=float, default=0.1)
+    args = parser.parse_args()
+    mock = start_mock_server(args.port, args.latency, args.error_rate)
+    print(f"Mock mytcas server on http://127.0.0.1:{mock.server_port}/search?q=... (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        mock.shutdown()
@@ -0,0 +1,96 @@
+import threading
+from collections import defaultdict
+
+import plotly.graph_objects as go
+import plotly.io as pio
+from flask import g, jsonify, request
+
+# Colors shared by every chart (px.colors.qualitative.Set1)
+SET1_COLORS = [
+    'rgb(228,26,28)', 'rgb(55,126,184)', 'rgb(77,175,74)', 'rgb(152,78,163)', 'rgb(255,127,0)',
+    'rgb(255,255,51)', 'rgb(166,86,40)', 'rgb(247,129,191)', 'rgb(153,153,153)',
+]
+
+# Minimal template carrying only the layout every dashboard figure shares.
+# Replaces plotly's default template, which adds ~8 KB of styling to every serialized figure.
+TCAS_TEMPLATE = go.layout.Template(
+    layout=dict(
+        colorway=SET1_COLORS,
+        font=dict(color='#2a3f5f'),
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        hovermode='closest',
+        xaxis=dict(automargin=True, zeroline=False),
+        yaxis=dict(automargin=True, gridcolor='#eeeeee', zeroline=False),
+    )
+)
+
+def use_slim_figure_template():
+    """Register TCAS_TEMPLATE and make it the default for every figure built afterwards."""
+    pio.templates['tcas'] = TCAS_TEMPLATE
+    pio.templates.default = 'tcas'
+
+
+class PayloadStats:
+    """Thread-safe per-callback counters of response bytes before and after compression."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = defaultdict(lambda: {'responses': 0, 'raw_bytes': 0, 'sent_bytes': 0})
+
+    def record(self, key, raw_bytes, sent_bytes):
+        with self._lock:
+            entry = self._stats[key]
+            entry['responses'] += 1
+            entry['raw_bytes'] += raw_bytes
+            entry['sent_bytes'] += sent_bytes
+
+    def report(self):
+        """Per-callback totals and averages, largest payload first."""
+        with self._lock:
+            rows = [dict(callback=key, **values) for key, values in self._stats.items()]
+        for row in rows:
+            row['avg_raw_bytes'] = round(row['raw_bytes'] / row['responses'])
+            row['avg_sent_bytes'] = round(row['sent_bytes'] / row['responses'])
+            row['ratio'] = round(row['sent_bytes'] / row['raw_bytes'], 3) if row['raw_bytes'] else 1.0
+        return sorted(rows, key=lambda row: row['avg_raw_bytes'], reverse=True)
+
+
+payload_stats = PayloadStats()
+
+
+def _callback_key():
+    """Name a Dash callback request by its output, e.g. 'ai-cost-histogram.figure...'."""
+    if request.path.endswith('_dash-update-component'):
+        body = request.get_json(silent=True) or {}
+        return body.get('output', request.path)
+    return request.path
+
+
+def install_payload_stats(server, stats_path='/_payload-stats'):
+    """Record the bytes of every Dash callback response before and after compression.
+
+    Compression itself is Flask-Compress, enabled with Dash(compress=True); call this once the
+    Dash app exists. Flask runs after_request hooks in reverse registration order, so the raw
+    size is read by a hook appended after Flask-Compress's (it runs first) and the sent size
+    by one inserted ahead of it (it runs last). The report is served as JSON from `stats_path`.
+    """
+    hooks = server.after_request_funcs.setdefault(None, [])
+
+    def record_raw_size(response):
+        if request.path.endswith('_dash-update-component') and not response.is_streamed:
+            g.payload_raw_bytes = len(response.get_data())
+        return response
+
+    def record_sent_size(response):
+        raw_bytes = g.pop('payload_raw_bytes', None)
+        if raw_bytes is not None and not response.is_streamed:
+            payload_stats.record(_callback_key(), raw_bytes, len(response.get_data()))
+        return response
+
+    hooks.append(record_raw_size)
+    hooks.insert(0, record_sent_size)
+
+    @server.route(stats_path)
+    def payload_report():
+        return jsonify(payload_stats.report())
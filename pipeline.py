@@ -0,0 +1,254 @@
+import argparse
+import asyncio
+import os
+import time
+from datetime import datetime
+from urllib.parse import quote
+
+import pandas as pd
+
+from cleaning import clean_cost_record
+from cost_scraper import DETAIL_COLUMNS, parse_program_details, parse_search_results
+from crawl_engine import MYTCAS_SEARCH_URL, CrawlEngine, CrawlJob, http_fetch
+from crawl_trace import CrawlTracer, elapsed_ms
+from history_store import record_snapshot
+from validation import WARNINGS_COLUMN, issue_counts, quarantine_path, validate_costs
+
+# What to search for per dataset (same keywords and filter words as main.py)
+SEARCH_OPTIONS = {
+    "aie": {"keyword": "วิศวกรรมศาสตร์ วิศวกรรมปัญญาประดิษฐ์", "prevent": "ปัญญาประดิษฐ์"},
+    "coe": {"keyword": "วิศวกรรมศาสตร์ วิศวกรรมคอมพิวเตอร์", "prevent": "คอมพิวเตอร์"},
+}
+# Cleaned file the dashboard reads for each dataset (see app.py)
+PUBLISHED_FILES = {
+    "aie": "cleaned_aie.csv",
+    "coe": "coe_with_term_and_total.csv",
+}
+RAW_COLUMNS = ["No", "University", "Program", "Course Name", "Course Type", "Link", "Cost"] + [
+    column for column in DETAIL_COLUMNS if column not in ("ค่าใช้จ่าย", "Course Name", "Course Type")
+]
+
+_DONE = object()  # End-of-stream marker passed down the stage queues
+
+
+class StageMetrics:
+    """Throughput and backlog of one pipeline stage."""
+
+    def __init__(self, name, inbox=None):
+        self.name = name
+        self.inbox = inbox
+        self.processed = 0
+        self.busy_s = 0.0
+        self.started = time.monotonic()
+
+    def snapshot(self):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return {
+            "stage": self.name,
+            "processed": self.processed,
+            "per_s": round(self.processed / elapsed, 2),
+            "busy_pct": round(100 * self.busy_s / elapsed, 1),
+            "backlog": self.inbox.qsize() if self.inbox is not None else 0,
+        }
+
+
+def _write_atomic(df, path, **to_csv_options):
+    # Write next to the target then rename, so the dashboard never reads a half-written file
+    tmp_path = f"{path}.tmp"
+    df.to_csv(tmp_path, **to_csv_options)
+    os.replace(tmp_path, path)
+
+
+def partial_path(published_path):
+    """In-progress file of a crawl, next to the published one; the dashboard never reads it."""
+    base, _ = os.path.splitext(published_path)
+    return f"{base}.partial.csv"
+
+
+def append_partial(rows, dataset, data_dir="data", first_no=1, columns=None):
+    """Append newly cleaned rows to the dataset's partial file (created with a header when first_no is 1).
+
+    Only the new rows are written, so progress costs O(rows) per crawl. Returns the columns
+    written, to be passed back for the next chunk so every chunk has the same layout.
+    """
+    directory = os.path.join(data_dir, dataset)
+    os.makedirs(directory, exist_ok=True)
+    df = pd.DataFrame(rows)
+    df.insert(0, "No", range(first_no, first_no + len(df)))
+    if columns is not None:
+        df = df.reindex(columns=columns)
+    path = partial_path(os.path.join(directory, PUBLISHED_FILES[dataset]))
+    df.to_csv(path, mode="w" if first_no == 1 else "a", header=first_no == 1, index=False, encoding="utf-8")
+    return list(df.columns)
+
+
+def publish(rows, dataset, data_dir="data"):
+    """Validate and write the cleaned dataset of a finished crawl (CSV for the dashboard, Parquet when pyarrow is available).
+
+    Rows failing validation go to the quarantine file instead. The raw CSV is written too, the
+    crawl is recorded in the history store and the crawl's partial file is removed.
+    """
+    directory = os.path.join(data_dir, dataset)
+    os.makedirs(directory, exist_ok=True)
+    df = pd.DataFrame(rows)
+    df.insert(0, "No", range(1, len(df) + 1))
+    # Validation compares rows with each other (duplicates, outliers), so it runs once on the whole crawl
+    cleaned, quarantine = validate_costs(df)
+    published_path = os.path.join(directory, PUBLISHED_FILES[dataset])
+    _write_atomic(cleaned, published_path, index=False)
+    _write_atomic(quarantine, quarantine_path(published_path), index=False, encoding="utf-8-sig")
+    try:
+        cleaned.to_parquet(os.path.join(directory, f"cleaned_{dataset}.parquet"), index=False)
+    except ImportError:
+        pass  # Parquet needs pyarrow; the CSV is what the dashboard reads
+
+    raw = df.reindex(columns=RAW_COLUMNS)
+    raw_path = os.path.join(directory, f"raw_{dataset}.csv")
+    _write_atomic(raw, raw_path, index=False, encoding="utf-8-sig")
+    record_snapshot(raw, dataset, db_path=os.path.join(data_dir, "history.sqlite"))
+    if not quarantine.empty:
+        print(f"⛔ กักไว้ {len(quarantine)} แถว {issue_counts(quarantine)} → {quarantine_path(published_path)}")
+    warnings = issue_counts(cleaned, WARNINGS_COLUMN)
+    if warnings:
+        print(f"⚠️ เก็บไว้แต่ควรตรวจ {warnings}")
+    if os.path.exists(partial_path(published_path)):
+        os.remove(partial_path(published_path))
+    return len(cleaned)
+
+
+async def run_pipeline(dataset, fetch=http_fetch, search_url=MYTCAS_SEARCH_URL, data_dir="data",
+                       queue_size=50, publish_every=20, report_every=5.0, **engine_options):
+    """Crawl → parse → clean → publish one dataset with the stages overlapping.
+
+    Stages are connected by bounded asyncio queues, so a slow stage pushes back on the ones
+    before it. Every `publish_every` cleaned rows the new rows are appended to a partial file;
+    the published file the dashboard reads is only replaced once the crawl finishes. Every URL is
+    traced to <data_dir>/crawl_trace.jsonl, with parse time measured in the parse stage.
+    Returns the final per-stage metrics.
+    """
+    option = SEARCH_OPTIONS[dataset]
+    parse_queue = asyncio.Queue(maxsize=queue_size)
+    clean_queue = asyncio.Queue(maxsize=queue_size)
+    publish_queue = asyncio.Queue(maxsize=queue_size)
+    metrics = {
+        "fetch": StageMetrics("fetch"),
+        "parse": StageMetrics("parse", parse_queue),
+        "clean": StageMetrics("clean", clean_queue),
+        "publish": StageMetrics("publish", publish_queue),
+    }
+
+    async def on_page(job, html):
+        metrics["fetch"].processed += 1
+        if job.kind == "search":
+            kept, skipped = parse_search_results(html, option["prevent"], base_url=job.url)
+            print(f"พบ {len(kept)} รายการ (ข้าม {len(skipped)})")
+            for item in kept:
+                engine.submit(CrawlJob("detail", item["Link"], meta=item))
+        else:
+            engine.defer_trace(job)  # Finished by the parse stage
+            await parse_queue.put((job, html))
+
+    engine_options.setdefault("tracer", CrawlTracer("pipeline", path=os.path.join(data_dir, "crawl_trace.jsonl")))
+    engine = CrawlEngine(on_page, fetch=fetch, **engine_options)
+
+    async def fetch_stage():
+        seed = CrawlJob("search", search_url.format(query=quote(option["keyword"])))
+        stats = await engine.run([seed])
+        await parse_queue.put(_DONE)
+        return stats
+
+    async def parse_stage():
+        while (item := await parse_queue.get()) is not _DONE:
+            job, html = item
+            started = time.monotonic()
+            parse_started = time.perf_counter()
+            details = await asyncio.to_thread(parse_program_details, html)
+            engine.finish_trace(job, details["Scrape Status"], parse_ms=elapsed_ms(parse_started),
+                                error=details["Scrape Error"])
+            record = {**job.meta, **details}
+            record["Cost"] = record.pop("ค่าใช้จ่าย", None)
+            metrics["parse"].busy_s += time.monotonic() - started
+            metrics["parse"].processed += 1
+            await clean_queue.put(record)
+        await clean_queue.put(_DONE)
+
+    async def clean_stage():
+        while (record := await clean_queue.get()) is not _DONE:
+            started = time.monotonic()
+            metrics["clean"].processed += 1
+            # Same final filter as main.py: the course name must contain the filter word
+            if option["prevent"] in str(record.get("Course Name", "")):
+                cleaned = clean_cost_record(record)
+                metrics["clean"].busy_s += time.monotonic() - started
+                await publish_queue.put(cleaned)
+        await publish_queue.put(_DONE)
+
+    async def publish_stage():
+        rows = []
+        written, columns = 0, None  # Rows already in the partial file, and its column layout
+        while (record := await publish_queue.get()) is not _DONE:
+            rows.append(record)
+            metrics["publish"].processed += 1
+            if len(rows) - written >= publish_every:
+                started = time.monotonic()
+                columns = await asyncio.to_thread(append_partial, rows[written:], dataset, data_dir, written + 1, columns)
+                written = len(rows)
+                metrics["publish"].busy_s += time.monotonic() - started
+        if not rows:
+            return 0
+        return await asyncio.to_thread(publish, rows, dataset, data_dir)
+
+    async def report():
+        while True:
+            await asyncio.sleep(report_every)
+            print(" | ".join(f"{m['stage']}: {m['processed']} ({m['per_s']}/s, backlog {m['backlog']})"
+                             for m in (stage.snapshot() for stage in metrics.values())))
+
+    reporter = asyncio.create_task(report())
+    try:
+        crawl_stats, _, _, published = await asyncio.gather(fetch_stage(), parse_stage(), clean_stage(), publish_stage())
+    finally:
+        reporter.cancel()
+    summary = [stage.snapshot() for stage in metrics.values()]
+    print(f"✅ {dataset}: เผยแพร่ {published} หลักสูตร | crawl {crawl_stats}")
+    for stage in summary:
+        print(f"   {stage}")
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape, clean and publish a TCAS dataset in one overlapping pipeline.")
+    parser.add_argument("dataset", choices=sorted(SEARCH_OPTIONS))
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=1.0, help="requests per second per host")
+    parser.add_argument("--publish-every", type=int, default=20)
+    parser.add_argument("--mock", action="store_true", help="crawl the local mock server instead of mytcas.com")
+    parser.add_argument("--browser", action="store_true", help="render pages in pooled headless Chrome instead of plain HTTP")
+    parser.add_argument("--lightweight-browser", action="store_true",
+                        help="with --browser: block images, fonts and analytics (experimental, see driver_pool.py)")
+    args = parser.parse_args()
+
+    url_template = MYTCAS_SEARCH_URL
+    server = None
+    if args.mock:
+        from mock_tcas_server import start_mock_server
+        server = start_mock_server(latency=0.05, error_rate=0.05)
+        url_template = f"http://127.0.0.1:{server.server_port}/search?q={{query}}"
+    fetcher, driver_pool = http_fetch, None
+    if args.browser:
+        from driver_pool import DriverPool, browser_fetch
+        driver_pool = DriverPool(size=args.concurrency, lightweight=True if args.lightweight_browser else None)
+        fetcher = browser_fetch(driver_pool)
+    print(f"เริ่ม pipeline '{args.dataset}' เวลา {datetime.now():%H:%M:%S}")
+    try:
+        asyncio.run(run_pipeline(
+            args.dataset, fetch=fetcher, search_url=url_template, data_dir=args.data_dir, publish_every=args.publish_every,
+            concurrency=args.concurrency, rate_per_host=args.rate, burst=args.concurrency,
+            timeout=2 if args.mock else 30, backoff_base=0.2 if args.mock else 1.0,
+        ))
+    finally:
+        if driver_pool is not None:
+            driver_pool.close()
+        if server is not None:
+            server.shutdown()
@@ -0,0 +1,90 @@
+import re
+import unicodedata
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+# Minimum share of the query's n-grams a name must contain to count as a match
+SEARCH_MIN_SCORE = 0.5
+
+
+def normalize_text(text):
+    """Lower-case, NFC-normalize and collapse punctuation/whitespace so Thai and English compare alike."""
+    text = unicodedata.normalize('NFC', str(text)).lower()
+    text = re.sub(r'[^\w\u0e00-\u0e7f]+', ' ', text)
+    return ' '.join(text.split())
+
+
+def char_ngrams(text, n=2):
+    """Set of character n-grams of normalized text, padded so short words still produce grams."""
+    text = normalize_text(text)
+    if not text:
+        return set()
+    padded = f' {text} '
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+class NgramIndex:
+    """Inverted index from character n-grams to positions in a list of texts."""
+
+    def __init__(self, texts, n=2):
+        self.n = n
+        postings = defaultdict(list)
+        self.gram_counts = np.zeros(len(texts), dtype=np.int32)
+        for pos, text in enumerate(texts):
+            grams = char_ngrams(text, n)
+            self.gram_counts[pos] = len(grams)
+            for gram in grams:
+                postings[gram].append(pos)
+        self.postings = {gram: np.asarray(positions, dtype=np.int32) for gram, positions in postings.items()}
+
+    def scores(self, query):
+        """Score every text against the query (0..1, higher is better) without scanning the texts."""
+        query_grams = char_ngrams(query, self.n)
+        scores = np.zeros(len(self.gram_counts), dtype=np.float64)
+        if not query_grams:
+            return scores
+        overlap = np.zeros(len(self.gram_counts), dtype=np.int32)
+        for gram in query_grams:
+            positions = self.postings.get(gram)
+            if positions is not None:
+                overlap[positions] += 1
+        # Containment of the query dominates; Dice similarity breaks ties in favour of tighter names
+        containment = overlap / len(query_grams)
+        dice = 2 * overlap / (len(query_grams) + np.maximum(self.gram_counts, 1))
+        scores[:] = 0.9 * containment + 0.1 * dice
+        return scores
+
+
+class ProgramSearchIndex:
+    """Fuzzy search over the categorical 'Course Name'/'Program' columns of one program dataset.
+
+    Only the distinct category values are indexed; row scores are looked up through the category codes.
+    """
+
+    def __init__(self, df, columns=('Course Name', 'Program'), n=2):
+        self.index = df.index
+        self._columns = []
+        for col in columns:
+            if col not in df.columns:
+                continue
+            codes = df[col].cat.codes.to_numpy()
+            self._columns.append((NgramIndex(df[col].cat.categories, n=n), codes))
+
+    def scores(self, query):
+        """Best score per row across the indexed columns, aligned with the dataset's rows."""
+        row_scores = np.zeros(len(self.index), dtype=np.float64)
+        for ngram_index, codes in self._columns:
+            vocab_scores = np.append(ngram_index.scores(query), 0.0)  # code -1 (missing) maps to the trailing 0
+            np.maximum(row_scores, vocab_scores[codes], out=row_scores)
+        return row_scores
+
+    def search(self, query, min_score=SEARCH_MIN_SCORE, limit=None):
+        """Ranked matches as a Series of scores indexed by row label, best first."""
+        scores = self.scores(query)
+        hits = np.flatnonzero(scores >= min_score)
+        order = hits[np.argsort(-scores[hits], kind='stable')]
+        if limit is not None:
+            order = order[:limit]
+        return pd.Series(scores[order], index=self.index[order], name='Match score')
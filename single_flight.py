@@ -0,0 +1,113 @@
+import json
+import threading
+from functools import wraps
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Runs at most one computation per key at a time; concurrent callers with that key share its result."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executions = 0
+        self.shared = 0
+
+    def do(self, key, fn, *args):
+        """Return fn(*args), or wait for and reuse the result of an identical call already in flight."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+            else:
+                self.shared += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn(*args)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+def _freeze(args):
+    # Callback inputs are JSON values (lists, dicts, numbers, strings), so JSON is a stable key
+    return json.dumps(args, sort_keys=True, default=str)
+
+
+class CallbackCoalescer:
+    """
+    Single-flight wrapper for Dash callbacks plus a cache of each page's default state.
+
+    Identical concurrent calls of a wrapped callback (same inputs, same data version) run once
+    and every caller gets that result. Callbacks registered with `default_args` have the result for
+    those inputs precomputed by warm() and served from memory until the data version changes.
+    Results are shared between requests, so callbacks must not mutate what they return later.
+    """
+
+    def __init__(self, data_version):
+        self.data_version = data_version
+        self.flight = SingleFlight()
+        self._functions = {}
+        self._default_args = {}
+        self._defaults = {}
+        self.default_hits = 0
+
+    def __call__(self, default_args=None):
+        """Decorator; `default_args` returns the callback's inputs for the page's initial, unfiltered state."""
+
+        def decorator(fn):
+            name = fn.__name__
+            self._functions[name] = fn
+            if default_args is not None:
+                self._default_args[name] = default_args
+
+            @wraps(fn)
+            def wrapper(*args):
+                key = (name, self.data_version(), _freeze(args))
+                cached = self._defaults.get(key)
+                if cached is not None:
+                    self.default_hits += 1
+                    return cached
+                return self.flight.do(key, fn, *args)
+
+            return wrapper
+
+        return decorator
+
+    def warm(self):
+        """Precompute the default state of every registered callback for the current data version."""
+        version = self.data_version()
+        defaults = {}
+        for name, default_args in self._default_args.items():
+            args = tuple(default_args())
+            key = (name, version, _freeze(args))
+            defaults[key] = self.flight.do(key, self._functions[name], *args)
+        self._defaults = defaults  # Swapped in one assignment; drops results of older data versions
+        return len(defaults)
+
+    def stats(self):
+        return {
+            'executions': self.flight.executions,
+            'shared_in_flight': self.flight.shared,
+            'default_state_hits': self.default_hits,
+            'default_states_cached': len(self._defaults),
+        }
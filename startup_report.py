@@ -0,0 +1,41 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StartupTimer:
+    """Collects how long each startup phase (imports, data load, layout builds) takes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self._last_mark = self._started
+        self.phases = []
+
+    def _add(self, name, seconds):
+        with self._lock:
+            self.phases.append({'phase': name, 'ms': round(seconds * 1000, 1)})
+
+    def mark(self, name):
+        """Record the time since the previous mark as phase `name` (for straight-line module code)."""
+        now = time.perf_counter()
+        self._add(name, now - self._last_mark)
+        self._last_mark = now
+
+    @contextmanager
+    def phase(self, name):
+        """Time the enclosed block as phase `name` (for work done later, e.g. lazy layout builds)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add(name, time.perf_counter() - start)
+
+    def report(self):
+        """Printable table of phases, slowest first, with the total time to the last mark."""
+        with self._lock:
+            phases = sorted(self.phases, key=lambda p: p['ms'], reverse=True)
+        lines = ["⏱️ Startup time report:"]
+        lines += [f"   {p['ms']:>8.1f} ms  {p['phase']}" for p in phases]
+        lines.append(f"   {(self._last_mark - self._started) * 1000:>8.1f} ms  total until ready")
+        return "\n".join(lines)
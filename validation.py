@@ -0,0 +1,138 @@
+import argparse
+import os
+
+import pandas as pd
+
+from cleaning import LEGACY_COST_PLACEHOLDERS
+
+# Columns a cleaned dataset must have; Link and Cost are checked too when present
+REQUIRED_COLUMNS = ('University', 'term', 'Total program cost')
+# Plausible tuition per term in baht; anything outside is a parsing error (e.g. a phone number or a year)
+MIN_TERM_COST = 5_000
+MAX_TERM_COST = 1_000_000
+# Plausible number of terms a program runs (a 1-year certificate up to 6 years of trimesters).
+# Program length varies (4-year, 5-year, 10-term...), so total / term is only checked against this range.
+MIN_PROGRAM_TERMS = 2
+MAX_PROGRAM_TERMS = 18
+# Modified z-score (median/MAD) above which a cost is an outlier within its university
+OUTLIER_Z = 3.5
+# Universities with fewer valid programs than this are not checked for outliers
+MIN_GROUP_SIZE = 4
+# Column listing why a quarantined row was rejected
+ISSUES_COLUMN = 'Validation Issues'
+# Column listing checks a kept row should be looked at for (outliers, imputed costs); empty when none
+WARNINGS_COLUMN = 'Validation Warnings'
+
+
+def _to_number(series):
+    return pd.to_numeric(series.astype(str).str.replace(',', ''), errors='coerce')
+
+
+def university_outliers(values, universities, z=OUTLIER_Z, min_group_size=MIN_GROUP_SIZE):
+    """Flag values whose modified z-score 0.6745·|x − median| / MAD exceeds `z` within their university.
+
+    NaN values are ignored when computing the medians. Groups smaller than `min_group_size`
+    or with MAD 0 are never flagged.
+    """
+    groups = values.groupby(universities, observed=True, dropna=False)
+    median = groups.transform('median')
+    deviation = (values - median).abs()
+    mad = deviation.groupby(universities, observed=True, dropna=False).transform('median')
+    size = groups.transform('count')
+    score = 0.6745 * deviation / mad.where(mad > 0)
+    return (score > z) & (size >= min_group_size)
+
+
+def _join_flags(flags):
+    # "a; b" naming the flagged columns of each row ('' when none)
+    return flags.dot(pd.Index(flags.columns) + '; ').str.rstrip('; ')
+
+
+def validate_costs(df):
+    """
+    Checks every row of a cleaned dataset in one vectorized pass.
+
+    Rows failing a check that makes their cost unusable (no total, unparseable or implausible
+    numbers, imputed costs, duplicates) are rejected. Outliers within a university are only
+    warnings: those rows are kept and listed in the 'Validation Warnings' column.
+
+    Args:
+        df (pd.DataFrame): Cleaned data with at least REQUIRED_COLUMNS.
+
+    Returns:
+        tuple: (valid, quarantine) DataFrames. valid has an added 'Validation Warnings' column,
+               e.g. "university_outlier"; quarantine holds the rejected rows with an added
+               'Validation Issues' column, e.g. "missing_cost; cost_out_of_range".
+
+    Raises:
+        ValueError: If a required column is missing.
+    """
+    missing_columns = [column for column in REQUIRED_COLUMNS if column not in df.columns]
+    if missing_columns:
+        raise ValueError(f"Missing required columns: {', '.join(missing_columns)}")
+
+    term = _to_number(df['term'])
+    total = _to_number(df['Total program cost'])
+    university = df['University'].astype('string').str.strip()
+    # A program without a per-term price still has a usable total (shown as N/A per term)
+    implied_terms = total / term
+
+    checks = {
+        'missing_university': university.isna() | (university == ''),
+        'missing_cost': df['Total program cost'].isna(),
+        'non_numeric_cost': (df['term'].notna() & term.isna()) | (df['Total program cost'].notna() & total.isna()),
+        'cost_out_of_range': ((term < MIN_TERM_COST) | (term > MAX_TERM_COST)
+                              | (total < MIN_TERM_COST * MIN_PROGRAM_TERMS)
+                              | (total > MAX_TERM_COST * MAX_PROGRAM_TERMS)),
+        'term_total_mismatch': (implied_terms < MIN_PROGRAM_TERMS) | (implied_terms > MAX_PROGRAM_TERMS),
+    }
+    if 'Link' in df.columns:
+        checks['duplicate_link'] = df['Link'].notna() & df['Link'].duplicated()
+    if 'Cost' in df.columns:
+        # Rows whose cost text is empty but still have numbers were imputed (the old global-max fill);
+        # a made-up price would skew the mean/min/max cards
+        cost_text = df['Cost'].astype('string')
+        no_cost_text = cost_text.isna() | cost_text.str.startswith(LEGACY_COST_PLACEHOLDERS).fillna(False)
+        checks['imputed_cost'] = no_cost_text & total.notna()
+    errors = pd.DataFrame(checks, index=df.index).fillna(False).astype(bool)
+    rejected = errors.any(axis=1)
+
+    # Outliers are judged against the rows that passed every check
+    warnings = pd.DataFrame({'university_outlier': university_outliers(total.where(~rejected), university)},
+                            index=df.index).fillna(False).astype(bool)
+
+    valid = df[~rejected].copy()
+    valid[WARNINGS_COLUMN] = _join_flags(warnings[~rejected])
+    quarantine = df[rejected].copy()
+    quarantine[ISSUES_COLUMN] = _join_flags(errors[rejected])
+    return valid, quarantine
+
+
+def quarantine_path(path):
+    """Where the quarantine file of a cleaned dataset goes: next to it, with a _quarantine suffix."""
+    base, _ = os.path.splitext(path)
+    return f"{base}_quarantine.csv"
+
+
+def issue_counts(frame, column=ISSUES_COLUMN):
+    """Number of rows per issue (or per warning, with column=WARNINGS_COLUMN)."""
+    if frame.empty or column not in frame.columns:
+        return {}
+    return frame[column].str.split('; ').explode().loc[lambda issues: issues != ''].value_counts().to_dict()
+
+
+# Check a published dataset: python validation.py data/coe/coe_with_term_and_total.csv
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Validate a cleaned TCAS dataset and write its quarantine file.')
+    parser.add_argument('path')
+    args = parser.parse_args()
+
+    valid, quarantine = validate_costs(pd.read_csv(args.path))
+    quarantine.to_csv(quarantine_path(args.path), index=False, encoding='utf-8-sig')
+    print(f"✅ {len(valid)} valid rows, ⛔ {len(quarantine)} quarantined → {quarantine_path(args.path)}")
+    for issue, count in issue_counts(quarantine).items():
+        print(f"   {issue}: {count}")
+    for warning, count in issue_counts(valid, WARNINGS_COLUMN).items():
+        print(f"   ⚠️ kept, flagged {warning}: {count}")
+    if not valid.empty:
+        print(f"   mean total after validation: {_to_number(valid['Total program cost']).mean():,.0f} Baht")